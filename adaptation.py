@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+
+"""Reglage de la mutation au cours de l'algorithme genetique."""
+
+import numpy as np
+from individu import Individu, PROBABILITE_MUTATION, PAS_MUTATION
+
+MODES = ('fixe', 'un_cinquieme', 'auto_adaptative', 'stagnation')
+
+
+class MutationAdaptative:
+    """
+    Classe qui regle la probabilite et le pas de mutation d'une execution.
+
+    Modes possibles :
+        - 'fixe' : probabilite et pas constants (0.4 et 5um par defaut) ;
+        - 'un_cinquieme' : regle du 1/5 : si plus d'un enfant sur cinq est
+          meilleur que ses deux parents, probabilite et pas augmentent,
+          sinon ils diminuent ;
+        - 'auto_adaptative' : chaque individu porte sa probabilite,
+          transmise a ses enfants (moyenne geometrique des parents) avec
+          une perturbation log-normale, la selection gardant les bonnes ;
+        - 'stagnation' : probabilite et pas diminuent apres fenetre
+          generations sans amelioration du meilleur score.
+
+    ...
+
+    Attributes
+    ----------
+    mode : str
+        Mode de reglage, parmi MODES.
+    probabilite : float
+        Probabilite de mutation d'un gene actuelle.
+    pas : float
+        Pas maximal de mutation des hauteurs actuel, en um.
+    facteur : float
+        Facteur multiplicatif d'une diminution (son inverse pour une
+        augmentation).
+    fenetre : integer
+        Nombre de generations sans amelioration avant une diminution.
+    tau : float
+        Ecart type du logarithme de la perturbation des probabilites.
+    probabilite_min, probabilite_max : float
+        Bornes de la probabilite.
+    sans_amelioration : integer
+        Nombre de generations depuis la derniere amelioration.
+    meilleur : float
+        Meilleur score rencontre.
+    historique : list of tuples
+        (probabilite moyenne des enfants, pas) de chaque generation.
+
+    Public methods
+    -------
+    get_pas() -> int
+        Obtient le pas entier a utiliser.
+    taux_enfants(taux_parents: np.array, graine: np.random.SeedSequence)
+        -> np.array
+        Obtient la probabilite de mutation de chaque enfant.
+    mettre_a_jour(scores_parents: np.array, scores_enfants: np.array,
+                  taux_enfants: np.array)
+        Regle la mutation apres une generation.
+    parametres() -> dict
+        Obtient les arguments qui recreent le reglage actuel.
+    """
+
+    def __init__(self, mode='fixe', probabilite=PROBABILITE_MUTATION,
+                 pas=PAS_MUTATION, facteur=0.85, fenetre=20, tau=0.2,
+                 probabilite_min=None, probabilite_max=0.5):
+        """
+        Initialise une instance de MutationAdaptative.
+
+        Parameters
+        ----------
+        mode : str, optional
+            Mode de reglage, parmi MODES.
+        probabilite : float, optional
+            Probabilite de mutation d'un gene initiale.
+        pas : float, optional
+            Pas maximal de mutation des hauteurs initial, en um.
+        facteur : float, optional
+            Facteur multiplicatif d'une diminution.
+        fenetre : integer, optional
+            Nombre de generations sans amelioration avant une diminution.
+        tau : float, optional
+            Ecart type du logarithme de la perturbation des probabilites.
+        probabilite_min : float, optional
+            Probabilite minimale, une mutation par genome par defaut.
+        probabilite_max : float, optional
+            Probabilite maximale.
+
+        Returns
+        -------
+        None.
+
+        """
+        if mode not in MODES:
+            raise ValueError("Mode de mutation inconnu : " + str(mode))
+        if probabilite_min is None:
+            probabilite_min = 1 / Individu.nombre_asperites
+        self.mode = mode
+        self.probabilite = probabilite
+        self.pas = pas
+        self.facteur = facteur
+        self.fenetre = fenetre
+        self.tau = tau
+        self.probabilite_min = probabilite_min
+        self.probabilite_max = probabilite_max
+        self.sans_amelioration = 0
+        self.meilleur = np.inf
+        self.historique = []
+
+    def get_pas(self):
+        """
+        Obtient le pas entier a utiliser.
+
+        Returns
+        -------
+        integer
+            Pas maximal de mutation, au moins 1um.
+
+        """
+        return max(int(round(self.pas)), 1)
+
+    def taux_enfants(self, taux_parents, graine):
+        """
+        Obtient la probabilite de mutation de chaque enfant.
+
+        L'enfant i a pour parents les individus i et i + 1.
+
+        Parameters
+        ----------
+        taux_parents : np.array of floats
+            Probabilite de mutation de chaque parent.
+        graine : np.random.SeedSequence
+            Graine de la generation, utilisee seulement en mode
+            'auto_adaptative'.
+
+        Returns
+        -------
+        np.array of floats
+            Probabilite de mutation de chaque enfant.
+
+        """
+        nombre_enfants = max(len(taux_parents) - 1, 0)
+        if self.mode != 'auto_adaptative':
+            return np.full(nombre_enfants, self.probabilite)
+        rng = np.random.default_rng(graine.spawn(1)[0])
+        taux = np.sqrt(taux_parents[:-1] * taux_parents[1:])
+        taux = taux * np.exp(self.tau * rng.standard_normal(nombre_enfants))
+        return np.clip(taux, self.probabilite_min, self.probabilite_max)
+
+    def mettre_a_jour(self, scores_parents, scores_enfants, taux_enfants):
+        """
+        Regle la mutation apres une generation.
+
+        Parameters
+        ----------
+        scores_parents : np.array of floats
+            Scores des parents selectionnes, du meilleur au moins bon.
+        scores_enfants : np.array of floats
+            Scores des enfants, l'enfant i etant issu des parents i et i+1.
+        taux_enfants : np.array of floats
+            Probabilite de mutation utilisee pour chaque enfant.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.mode == 'un_cinquieme' and len(scores_enfants):
+            meilleurs_parents = np.minimum(scores_parents[:-1],
+                                           scores_parents[1:])
+            succes = np.mean(scores_enfants < meilleurs_parents)
+            if succes > 1/5:
+                self.__changer(1 / self.facteur)
+            elif succes < 1/5:
+                self.__changer(self.facteur)
+        meilleur = np.min(np.concatenate((scores_parents, scores_enfants)))
+        if meilleur < self.meilleur:
+            self.meilleur = meilleur
+            self.sans_amelioration = 0
+        else:
+            self.sans_amelioration += 1
+            if (self.mode == 'stagnation'
+                    and self.sans_amelioration >= self.fenetre):
+                self.__changer(self.facteur)
+                self.sans_amelioration = 0
+        self.historique.append((float(np.mean(taux_enfants))
+                                if len(taux_enfants) else self.probabilite,
+                                self.get_pas()))
+
+    def __changer(self, facteur):
+        """
+        Multiplie la probabilite et le pas, sans sortir de leurs bornes.
+
+        Parameters
+        ----------
+        facteur : float
+            Facteur multiplicatif.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.probabilite = float(np.clip(self.probabilite * facteur,
+                                         self.probabilite_min,
+                                         self.probabilite_max))
+        self.pas = float(np.clip(self.pas * facteur, 1, 60))
+
+    def parametres(self):
+        """
+        Obtient les arguments qui recreent le reglage actuel.
+
+        Returns
+        -------
+        dict
+            Arguments de MutationAdaptative.
+
+        """
+        return {'mode': self.mode, 'probabilite': self.probabilite,
+                'pas': self.pas, 'facteur': self.facteur,
+                'fenetre': self.fenetre, 'tau': self.tau,
+                'probabilite_min': self.probabilite_min,
+                'probabilite_max': self.probabilite_max}
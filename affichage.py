@@ -226,7 +226,7 @@ def hauteur(hauteurs, n=None):
 
     """
     N = 121  # Nombre de barres plus 1
-    hauteur_max = np.max(hauteurs)  # Hauteur maximale
+    hauteur_max = float(np.max(hauteurs))  # Hauteur maximale
     bins = [i*hauteur_max/N for i in range(N+1)]  # Bornes des barres
     plt.hist(hauteurs, bins)
     plt.xlabel('Hauteur (\u03BCm)')
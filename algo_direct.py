@@ -5,9 +5,14 @@
 
 import random
 import math
+import threading
+from collections import OrderedDict
 import numpy as np
 import affichage
 
+E_ETOILE = 1.36 * 10 ** 6  # Valeur de la slide 24 du diapo de A. Aymard
+NOMBRE_POINTS = 10000  # Nombre de points des courbes de la loi totale
+
 
 def loi_indentation(rayons_courbure, hauteurs, delta):
     """
@@ -30,11 +35,13 @@ def loi_indentation(rayons_courbure, hauteurs, delta):
         Liste avec les aires de contact de chaque sphere.
 
     """
-    E_etoile = 1.36 * 10 ** 6  # Valeur de la slide 24 du diapo de A. Aymard
+    # Les genomes sont stockes en entiers compacts : calculs en flottants
+    rayons_courbure = np.asarray(rayons_courbure, dtype=float)
+    hauteurs = np.asarray(hauteurs, dtype=float)
     hauteur_max = np.max(hauteurs)  # Donne la hauteur la plus elevee
     # Calcul de la force i selon la slide 27, en 10**12
     deltas = np.maximum(delta + hauteurs - hauteur_max, 0)
-    forces = (4/3 * E_etoile
+    forces = (4/3 * E_ETOILE
               * np.sqrt(rayons_courbure * np.pi)
               * deltas
               ** (3/2))
@@ -43,7 +50,128 @@ def loi_indentation(rayons_courbure, hauteurs, delta):
     return force_tot, aires_contact
 
 
-def loi_totale(rayons_courbure, hauteurs):
+def _derivees_penetrations(rayons_courbure, hauteurs, deltas):
+    """
+    Calcule la loi et ses derivees a plusieurs indentations a la fois.
+
+    Une asperite de penetration d_i donne dF/dh_i = 2 E* sqrt(pi R_i)
+    sqrt(d_i), dA/dh_i = pi R_i, dF/dR_i = F_i / (2 R_i) et
+    dA/dR_i = A_i / R_i. La loi ne depend que des ecarts a l'asperite la
+    plus haute : la derivee d'une asperite la plus haute par rapport a sa
+    hauteur est celle d'une petite hausse, qui eloigne toutes les autres.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    deltas : np.array of floats
+        Indentations totales.
+
+    Returns
+    -------
+    forces : np.array of floats
+        Force totale a chaque indentation.
+    aires_contact : np.array of floats
+        Tableau (indentations, asperites) des aires de contact.
+    derivees_forces : np.array of floats
+        Tableau (2, indentations, asperites) des derivees de la force
+        totale par rapport aux hauteurs puis aux rayons.
+    derivees_aires : np.array of floats
+        Tableau (2, indentations, asperites) des derivees de l'aire totale
+        par rapport aux hauteurs puis aux rayons.
+    pentes : np.array of floats
+        Tableau (2, indentations) des derivees de la force et de l'aire
+        totales par rapport a l'indentation.
+
+    """
+    hauteur_max = np.max(hauteurs)
+    penetrations = np.maximum(np.reshape(deltas, (-1, 1)) + hauteurs
+                              - hauteur_max, 0)
+    racines = np.sqrt(penetrations)
+    poids_forces = 4/3 * E_ETOILE * np.sqrt(np.pi * rayons_courbure)
+    forces = poids_forces * penetrations * racines
+    aires_contact = np.pi * rayons_courbure * penetrations
+    derivees_forces = np.stack((1.5 * poids_forces * racines,
+                                forces / (2 * rayons_courbure)))
+    derivees_aires = np.stack((np.pi * rayons_courbure * (penetrations > 0),
+                               np.pi * penetrations))
+    # Derivees par rapport a l'indentation : somme des derivees en hauteur
+    pentes = np.stack((np.sum(derivees_forces[0], axis=1),
+                       np.sum(derivees_aires[0], axis=1)))
+    plus_hautes = hauteurs == hauteur_max
+    derivees_forces[0][:, plus_hautes] -= pentes[0].reshape(-1, 1)
+    derivees_aires[0][:, plus_hautes] -= pentes[1].reshape(-1, 1)
+    return (np.sum(forces, axis=1), aires_contact, derivees_forces,
+            derivees_aires, pentes)
+
+
+def loi_indentation_derivees(rayons_courbure, hauteurs, delta):
+    """
+    Realise le calcul de loi_indentation et de ses derivees.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbures des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    delta : float
+        Indentation totale.
+
+    Returns
+    -------
+    force_tot : float
+        Force totale exercee.
+    aires_contact : np.array of floats
+        Liste avec les aires de contact de chaque sphere.
+    derivees_forces : np.array of floats
+        Tableau (2, asperites) des derivees de la force totale par rapport
+        a la hauteur puis au rayon de chaque asperite.
+    derivees_aires : np.array of floats
+        Tableau (2, asperites) des derivees de l'aire de contact totale par
+        rapport a la hauteur puis au rayon de chaque asperite.
+
+    """
+    # Les genomes sont stockes en entiers compacts : calculs en flottants
+    rayons_courbure = np.asarray(rayons_courbure, dtype=float)
+    hauteurs = np.asarray(hauteurs, dtype=float)
+    forces, aires_contact, derivees_forces, derivees_aires, _ = (
+        _derivees_penetrations(rayons_courbure, hauteurs, delta))
+    return (forces[0], aires_contact[0], derivees_forces[:, 0],
+            derivees_aires[:, 0])
+
+
+def grouper_asperites(rayons_courbure, hauteurs):
+    """
+    Regroupe les asperites ayant la meme hauteur et le meme rayon de courbure.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+
+    Returns
+    -------
+    rayons_groupes : np.array of floats
+        Rayon de courbure de chaque groupe.
+    hauteurs_groupes : np.array of floats
+        Hauteur de chaque groupe.
+    effectifs : np.array of integers
+        Nombre d'asperites dans chaque groupe.
+
+    """
+    couples, effectifs = np.unique(np.column_stack((hauteurs,
+                                                    rayons_courbure)
+                                                   ).astype(float),
+                                   axis=0, return_counts=True)
+    return couples[:, 1], couples[:, 0], effectifs
+
+
+def loi_totale(rayons_courbure, hauteurs, groupee=False, cache=None):
     """
     Realise le calcule des points pour la courbe aire en fonction de la force.
 
@@ -53,6 +181,13 @@ def loi_totale(rayons_courbure, hauteurs):
         Liste avec les rayons de courbure des spheres.
     hauteurs : np.array of floats
         Liste avec les hauteurs des spheres.
+    groupee : boolean, optional
+        Si True, les asperites identiques (hauteur, rayon) sont regroupees et
+        une seule courbe est calculee par groupe puis ponderee par son
+        effectif. Le cout ne depend alors plus que du nombre de groupes.
+    cache : CacheCourbes, optional
+        Si renseigne et que les hauteurs sont entieres, les courbes sont lues
+        dans les tables du cache au lieu d'etre recalculees.
 
     Returns
     -------
@@ -62,9 +197,19 @@ def loi_totale(rayons_courbure, hauteurs):
         Valeurs des aires de contact totale en fonction de la force.
 
     """
-    N = 10000  # Nombre de points
+    # Les genomes sont stockes en entiers compacts : calculs en flottants
+    rayons_courbure = np.asarray(rayons_courbure, dtype=float)
+    hauteurs = np.asarray(hauteurs, dtype=float)
+    if (cache is not None and cache.N == NOMBRE_POINTS
+            and np.all(hauteurs == np.rint(hauteurs))):
+        forces_totales, aires_totales = loi_totale_population(
+            rayons_courbure.reshape(1, -1), hauteurs.reshape(1, -1), cache)
+        return forces_totales[0], aires_totales[0]
+    N = NOMBRE_POINTS  # Nombre de points
     hauteur_max = np.max(hauteurs)  # Donne la hauteur la plus elevee
-    E_etoile = 1.36 * 10 ** 6  # Valeur de la slide 24 du diapo de A. Aymard
+    if groupee:
+        rayons_courbure, hauteurs, effectifs = grouper_asperites(
+            rayons_courbure, hauteurs)
     deltas = np.maximum(hauteur_max / N * np.ones((len(hauteurs), 1))
                         * np.arange(0, N)
                         + hauteurs.reshape(len(hauteurs), 1) * np.ones((1, N))
@@ -73,16 +218,370 @@ def loi_totale(rayons_courbure, hauteurs):
     aires_contact = (np.pi
                      * np.multiply(rayons_courbure.reshape(len(hauteurs), 1),
                                    deltas))
-    forces = (4/3 * E_etoile * np.sqrt(np.pi)
+    forces = (4/3 * E_ETOILE * np.sqrt(np.pi)
               * np.multiply(
               np.sqrt(rayons_courbure.reshape(len(hauteurs), 1)),
               deltas**(3/2)))
-    aires_totales = np.sum(aires_contact, 0)  # Aire de contacte totale
-    forces_totales = np.sum(forces, 0)
+    if groupee:
+        # Chaque courbe de groupe compte autant de fois que son effectif
+        aires_totales = effectifs @ aires_contact
+        forces_totales = effectifs @ forces
+    else:
+        aires_totales = np.sum(aires_contact, 0)  # Aire de contacte totale
+        forces_totales = np.sum(forces, 0)
     return forces_totales, aires_totales
 
 
-def get_force_aire(forces, aires, point):
+def table_courbes(hauteur_max, rayon=1, N=NOMBRE_POINTS):
+    """
+    Calcule les courbes d'une asperite pour chaque ecart de hauteur.
+
+    La ligne g correspond a une asperite situee g um sous la plus haute,
+    sur la grille d'indentation de loi_totale. Les courbes d'un rayon R
+    s'obtiennent aussi a partir du rayon unite : la force est multipliee par
+    sqrt(R) et l'aire par R.
+
+    Parameters
+    ----------
+    hauteur_max : integer
+        Hauteur de l'asperite la plus haute.
+    rayon : float, optional
+        Rayon de courbure de l'asperite.
+    N : integer, optional
+        Nombre de points de la grille d'indentation.
+
+    Returns
+    -------
+    forces : np.array of floats
+        Tableau (hauteur_max + 1, N) des forces.
+    aires : np.array of floats
+        Tableau (hauteur_max + 1, N) des aires.
+
+    """
+    deltas = np.maximum(hauteur_max / N * np.arange(0, N)
+                        - np.arange(hauteur_max + 1).reshape(-1, 1), 0)
+    forces = 4/3 * E_ETOILE * np.sqrt(np.pi * rayon) * deltas**(3/2)
+    aires = np.pi * rayon * deltas
+    return forces, aires
+
+
+class CacheCourbes:
+    """
+    Cache LRU des tables de courbes par rayon de courbure et ecart de hauteur.
+
+    Les tables peuvent etre stockees en simple precision (np.float32) : la
+    memoire et le cout des produits matriciels sont divises par deux. Chaque
+    valeur d'une table est alors arrondie a u = 2**-24 pres (erreur
+    relative), et une loi totale etant une somme de termes positifs sur au
+    plus hauteur_max + 1 ecarts, son erreur relative est bornee par
+    (hauteur_max + 3) * u, soit environ 7.3e-6 pour des hauteurs jusqu'a
+    120um. C'est bien moins que l'ecart relatif entre deux points voisins de
+    la grille de N = 10000 points.
+
+    Le cache peut etre utilise par plusieurs threads a la fois.
+
+    ...
+
+    Attributes
+    ----------
+    memoire_max : integer
+        Memoire maximale occupee par les tables, en octets.
+    N : integer
+        Nombre de points de la grille d'indentation.
+    memoire : integer
+        Memoire actuellement occupee par les tables, en octets.
+    dtype : np.dtype
+        Type des tables, np.float64 ou np.float32.
+
+    Public methods
+    -------
+    get_tables(rayon: float, hauteur_max: int) -> tuple of np.array
+        Obtient les tables (ecart, N) des forces et des aires d'un rayon.
+    prechauffer(rayons: list of floats, hauteurs_max: list of int)
+        Calcule a l'avance les tables de plusieurs rayons.
+    vider()
+        Vide le cache.
+    """
+
+    def __init__(self, memoire_max=256 * 2**20, N=NOMBRE_POINTS,
+                 dtype=np.float64):
+        """
+        Initialise une instance de CacheCourbes.
+
+        Parameters
+        ----------
+        memoire_max : integer, optional
+            Memoire maximale occupee par les tables, en octets.
+        N : integer, optional
+            Nombre de points de la grille d'indentation.
+        dtype : np.dtype, optional
+            Type des tables, np.float32 pour la simple precision.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.memoire_max = memoire_max
+        self.N = N
+        self.dtype = np.dtype(dtype)
+        self.memoire = 0
+        self.__tables = OrderedDict()
+        self.__verrou = threading.Lock()
+
+    def __getstate__(self):
+        """
+        Obtient l'etat a transmettre aux processus, sans le verrou.
+
+        Returns
+        -------
+        dict
+            Attributs de l'instance.
+
+        """
+        etat = self.__dict__.copy()
+        del etat['_CacheCourbes__verrou']
+        return etat
+
+    def __setstate__(self, etat):
+        """
+        Restaure l'etat transmis, avec un nouveau verrou.
+
+        Parameters
+        ----------
+        etat : dict
+            Attributs de l'instance.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.__dict__.update(etat)
+        self.__verrou = threading.Lock()
+
+    def get_tables(self, rayon, hauteur_max):
+        """
+        Obtient les tables des forces et des aires d'un rayon.
+
+        Parameters
+        ----------
+        rayon : float
+            Rayon de courbure des asperites.
+        hauteur_max : integer
+            Hauteur de l'asperite la plus haute, qui fixe la grille.
+
+        Returns
+        -------
+        forces : np.array of floats
+            Tableau (hauteur_max + 1, N) des forces, en lecture seule.
+        aires : np.array of floats
+            Tableau (hauteur_max + 1, N) des aires, en lecture seule.
+
+        """
+        cle = (float(rayon), int(hauteur_max))
+        with self.__verrou:
+            tables = self.__tables.get(cle)
+            if tables is not None:
+                self.__tables.move_to_end(cle)  # Utilise le plus recemment
+                return tables
+        # Calcul hors du verrou : deux threads peuvent calculer la meme table
+        tables = tuple(table.astype(self.dtype, copy=False)
+                       for table in table_courbes(cle[1], cle[0], self.N))
+        for table in tables:
+            table.flags.writeable = False  # Tables partagees
+        with self.__verrou:
+            if cle not in self.__tables:
+                self.__tables[cle] = tables
+                self.memoire += sum(table.nbytes for table in tables)
+            # On garde toujours au moins la derniere table demandee
+            while (self.memoire > self.memoire_max
+                   and len(self.__tables) > 1):
+                _, anciennes = self.__tables.popitem(last=False)
+                self.memoire -= sum(table.nbytes for table in anciennes)
+        return tables
+
+    def prechauffer(self, rayons, hauteurs_max):
+        """
+        Calcule a l'avance les tables de plusieurs rayons.
+
+        Parameters
+        ----------
+        rayons : list of floats
+            Rayons de courbure possibles.
+        hauteurs_max : list of integers
+            Hauteurs maximales possibles.
+
+        Returns
+        -------
+        None.
+
+        """
+        for hauteur_max in hauteurs_max:
+            for rayon in rayons:
+                self.get_tables(rayon, hauteur_max)
+
+    def vider(self):
+        """
+        Vide le cache.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self.__verrou:
+            self.__tables.clear()
+            self.memoire = 0
+
+
+# Cache partage par tout le module, herite par les processus de calcul
+cache_courbes = CacheCourbes()
+
+
+def installer_cache(cache):
+    """
+    Remplace le cache des courbes du module.
+
+    Sert d'initialisation des processus de calcul pour leur transmettre un
+    cache deja rempli.
+
+    Parameters
+    ----------
+    cache : CacheCourbes
+        Cache a utiliser.
+
+    Returns
+    -------
+    None.
+
+    """
+    global cache_courbes
+    cache_courbes = cache
+
+
+def loi_totale_population(rayons_courbure, hauteurs, cache=None, pas=1):
+    """
+    Realise le calcul des lois totales de toute une population a la fois.
+
+    Chaque surface est resumee par ses effectifs d'asperites par ecart de
+    hauteur (ponderes par sqrt(R) pour la force et R pour l'aire) : les lois
+    s'obtiennent par un produit matriciel avec les tables du rayon unite.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Tableau (taille_population, nombre_asperites) des rayons de courbure.
+    hauteurs : np.array of integers
+        Tableau (taille_population, nombre_asperites) des hauteurs entieres.
+    cache : CacheCourbes, optional
+        Cache des tables de courbes, celui du module par defaut.
+    pas : integer, optional
+        Seul un point sur pas de la grille d'indentation est calcule, pour
+        une evaluation grossiere moins couteuse.
+
+    Returns
+    -------
+    forces_totales : np.array of floats
+        Tableau (taille_population, N / pas) des forces.
+    aires_totales : np.array of floats
+        Tableau (taille_population, N / pas) des aires de contact totales.
+
+    """
+    if cache is None:
+        cache = cache_courbes
+    hauteurs = np.rint(np.asarray(hauteurs, dtype=float)).astype(np.int64)
+    rayons_courbure = np.asarray(rayons_courbure, dtype=float)
+    hauteurs_max = np.max(hauteurs, axis=1)
+    nombre_points = len(range(0, cache.N, pas))
+    forces_totales = np.empty((len(hauteurs), nombre_points),
+                              dtype=cache.dtype)
+    aires_totales = np.empty((len(hauteurs), nombre_points),
+                             dtype=cache.dtype)
+    # La grille d'indentation depend de la hauteur maximale de la surface
+    for hauteur_max in np.unique(hauteurs_max):
+        lignes = np.flatnonzero(hauteurs_max == hauteur_max)
+        nombre_ecarts = hauteur_max + 1
+        indices = (np.arange(len(lignes)).reshape(-1, 1) * nombre_ecarts
+                   + hauteur_max - hauteurs[lignes])
+        taille = len(lignes) * nombre_ecarts
+        poids_forces = np.bincount(indices.ravel(),
+                                   np.sqrt(rayons_courbure[lignes]).ravel(),
+                                   taille).reshape(len(lignes), -1)
+        poids_aires = np.bincount(indices.ravel(),
+                                  rayons_courbure[lignes].ravel(),
+                                  taille).reshape(len(lignes), -1)
+        # Une seule table (rayon unite) sert pour tous les rayons
+        forces, aires = cache.get_tables(1, hauteur_max)
+        if pas > 1:
+            forces = np.ascontiguousarray(forces[:, ::pas])
+            aires = np.ascontiguousarray(aires[:, ::pas])
+        forces_totales[lignes] = poids_forces.astype(cache.dtype) @ forces
+        aires_totales[lignes] = poids_aires.astype(cache.dtype) @ aires
+    return forces_totales, aires_totales
+
+
+def get_forces_aires(forces, aires, points, interpolation=False):
+    """Retrouve en une fois les points necessaires aux scores.
+
+    Version vectorisee de get_force_aire : les courbes etant croissantes en
+    fonction de l'indentation, la recherche du point le plus proche se fait
+    par dichotomie (np.searchsorted) pour tous les points a la fois.
+
+    Parameters
+    ----------
+    forces : np.array of floats
+        Liste des forces totales provenant de la loi de frottement.
+    aires : np.array of floats
+        Liste des aires totales provenant de la loi de frottement.
+    points : list of couple of floats
+        Points que l'on souhaite atteindre (force, aire).
+    interpolation : boolean, optional
+        Si True, interpole lineairement entre les deux points de la courbe
+        qui encadrent la cible au lieu de prendre le point le plus proche.
+
+    Returns
+    -------
+    forces_points : np.array of floats
+        Force correspondant a l'aire de chaque point.
+    aires_points : np.array of floats
+        Aire totale correspondant a la force de chaque point.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if interpolation:
+        return (np.interp(points[:, 1], aires, forces),
+                np.interp(points[:, 0], forces, aires))
+    i = _indices_plus_proches(forces, points[:, 0])
+    j = _indices_plus_proches(aires, points[:, 1])
+    return forces[j], aires[i]
+
+
+def _indices_plus_proches(valeurs, cibles):
+    """
+    Donne l'indice de la valeur la plus proche de chaque cible.
+
+    Parameters
+    ----------
+    valeurs : np.array of floats
+        Valeurs triees par ordre croissant.
+    cibles : np.array of floats
+        Valeurs recherchees.
+
+    Returns
+    -------
+    np.array of integers
+        Indices des valeurs les plus proches, le plus petit en cas d'egalite.
+
+    """
+    droite = np.clip(np.searchsorted(valeurs, cibles), 1, len(valeurs) - 1)
+    gauche = droite - 1
+    # Comme min, on garde le premier indice en cas d'egalite
+    plus_proche_gauche = (np.abs(valeurs[gauche] - cibles)
+                          <= np.abs(valeurs[droite] - cibles))
+    return np.where(plus_proche_gauche, gauche, droite)
+
+
+def get_force_aire(forces, aires, point, interpolation=False):
     """Retrouve les points necessaires aux scores.
 
     A partir d'un point, retrouve la force correspondant a l'aire de ce
@@ -96,6 +595,9 @@ def get_force_aire(forces, aires, point):
         Liste des aires totales provenant de la loi de frottement.
     point : couple of float
         Point que l'on souhaite atteindre (force, aire).
+    interpolation : boolean, optional
+        Si True, interpole lineairement au lieu de prendre le point le plus
+        proche.
 
     Returns
     -------
@@ -104,9 +606,384 @@ def get_force_aire(forces, aires, point):
     aire : float
         Aire totale correspondant a la force du point.
     """
-    i = min(range(len(forces)), key=lambda i: abs(forces[i] - point[0]))
-    j = min(range(len(aires)), key=lambda j: abs(aires[j] - point[1]))
-    return forces[j], aires[i]
+    force, aire = get_forces_aires(forces, aires, [point], interpolation)
+    return force[0], aire[0]
+
+
+def resoudre_points(rayons_courbure, hauteurs, points, precision=1e-6):
+    """
+    Calcule les forces et aires aux seuls points du cahier des charges.
+
+    Les relations force(delta) et aire(delta) etant croissantes, on cherche
+    par dichotomie l'indentation qui donne la force (respectivement l'aire)
+    de chaque point, sans construire la courbe complete de N points.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    precision : float, optional
+        Precision voulue sur l'indentation, en um.
+
+    Returns
+    -------
+    forces_points : np.array of floats
+        Force correspondant a l'aire de chaque point.
+    aires_points : np.array of floats
+        Aire totale correspondant a la force de chaque point.
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    hauteur_max = np.max(hauteurs)  # Donne la hauteur la plus elevee
+    rayons_courbure, hauteurs, effectifs = grouper_asperites(rayons_courbure,
+                                                             hauteurs)
+    ecarts = (hauteur_max - hauteurs).reshape(-1, 1)
+    poids_forces = 4/3 * E_ETOILE * np.sqrt(np.pi) * effectifs * np.sqrt(
+        rayons_courbure)
+    poids_aires = np.pi * effectifs * rayons_courbure
+
+    def force(delta):
+        return poids_forces @ np.maximum(delta - ecarts, 0)**(3/2)
+
+    def aire(delta):
+        return poids_aires @ np.maximum(delta - ecarts, 0)
+
+    # Les cibles hors de la courbe sont ramenees aux bornes [0, hauteur_max]
+    delta_forces = _dichotomie(force, points[:, 0], hauteur_max, precision)
+    delta_aires = _dichotomie(aire, points[:, 1], hauteur_max, precision)
+    return force(delta_aires), aire(delta_forces)
+
+
+def _dichotomie(fonction, cibles, borne, precision):
+    """
+    Resout fonction(delta) = cible sur [0, borne] pour toutes les cibles.
+
+    Parameters
+    ----------
+    fonction : function
+        Fonction croissante, evaluee sur un np.array d'indentations.
+    cibles : np.array of floats
+        Valeurs recherchees.
+    borne : float
+        Borne superieure de l'intervalle de recherche.
+    precision : float
+        Largeur finale de l'intervalle de recherche.
+
+    Returns
+    -------
+    np.array of floats
+        Indentations solutions.
+
+    """
+    bas = np.zeros(len(cibles))
+    haut = np.full(len(cibles), float(borne))
+    iterations = int(np.ceil(np.log2(max(borne, precision) / precision)))
+    for _ in range(iterations):
+        milieu = (bas + haut) / 2
+        trop_haut = fonction(milieu) > cibles
+        haut = np.where(trop_haut, milieu, haut)
+        bas = np.where(trop_haut, bas, milieu)
+    return (bas + haut) / 2
+
+
+def loi_totale_adaptative(rayons_courbure, hauteurs, points, tolerance=1e-6,
+                          nombre_initial=32, iterations_max=40):
+    """
+    Calcule la loi totale sur une grille d'indentation adaptee aux points.
+
+    On part d'une grille reguliere grossiere. Pour chaque point, on prend
+    les intervalles de la grille qui encadrent sa force et son aire. La loi
+    a une cassure a chaque ecart de hauteur, ou une asperite entre en
+    contact : les ecarts qui tombent dans un intervalle encadrant sont
+    d'abord ajoutes a la grille. Ensuite, on evalue la loi exacte a
+    l'indentation lue par interpolation pour chaque cible, et on estime
+    l'erreur de la lecture interpolee. Cette estimation combine l'ecart
+    entre la loi et la corde, et le residu de la cible ramene par la pente
+    de la corde. Elle est normalisee comme le score. Les indentations dont
+    l'erreur depasse la tolerance sont ajoutees a la grille, jusqu'a ce
+    qu'il n'y en ait plus. Les points de la grille se concentrent ainsi
+    autour des indentations du cahier des charges.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    tolerance : float, optional
+        Erreur maximale des lectures interpolees aux points, relative a la
+        force et a l'aire du dernier point.
+    nombre_initial : integer, optional
+        Nombre de points de la grille reguliere de depart.
+    iterations_max : integer, optional
+        Nombre maximal de raffinements.
+
+    Returns
+    -------
+    deltas : np.array of floats
+        Indentations de la grille, croissantes.
+    forces_totales : np.array of floats
+        Force totale a chaque indentation.
+    aires_totales : np.array of floats
+        Aire de contact totale a chaque indentation.
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    hauteur_max = np.max(hauteurs)  # Donne la hauteur la plus elevee
+    rayons_courbure, hauteurs, effectifs = grouper_asperites(rayons_courbure,
+                                                             hauteurs)
+    ecarts = hauteur_max - hauteurs
+    cassures = np.unique(ecarts)
+    poids_forces = 4/3 * E_ETOILE * np.sqrt(np.pi) * effectifs * np.sqrt(
+        rayons_courbure)
+    poids_aires = np.pi * effectifs * rayons_courbure
+
+    def loi(deltas):
+        penetrations = np.maximum(deltas.reshape(-1, 1) - ecarts, 0)
+        return (penetrations**(3/2) @ poids_forces,
+                penetrations @ poids_aires)
+
+    def lecture(valeurs, autres, cibles, deltas):
+        """Interpole les cibles, renvoie (indentation, lecture, pente)."""
+        droites = np.clip(np.searchsorted(valeurs, cibles), 1,
+                          len(deltas) - 1)
+        gauches = droites - 1
+        pas_valeurs = valeurs[droites] - valeurs[gauches]
+        pas_autres = autres[droites] - autres[gauches]
+        fractions = np.clip(np.divide(
+            cibles - valeurs[gauches], pas_valeurs,
+            out=np.zeros(len(cibles)), where=pas_valeurs > 0), 0, 1)
+        pentes = np.divide(pas_autres, pas_valeurs,
+                           out=np.zeros(len(cibles)), where=pas_valeurs > 0)
+        # Hors de la courbe, la lecture est ramenee aux bornes, sans erreur
+        pentes[cibles > valeurs[-1]] = 0
+        return (deltas[gauches] + fractions * (deltas[droites]
+                                               - deltas[gauches]),
+                autres[gauches] + fractions * pas_autres, pentes, droites)
+
+    deltas = np.linspace(0, hauteur_max, nombre_initial)
+    forces, aires = loi(deltas)
+    for _ in range(iterations_max):
+        deltas_forces, aires_lues, pentes_aires, droites_forces = lecture(
+            forces, aires, points[:, 0], deltas)
+        deltas_aires, forces_lues, pentes_forces, droites_aires = lecture(
+            aires, forces, points[:, 1], deltas)
+        # Cassures de la loi dans les intervalles qui encadrent les cibles
+        indices = np.searchsorted(deltas, cassures)
+        dans = (np.isin(indices, np.concatenate((droites_forces,
+                                                 droites_aires)))
+                & (deltas[np.minimum(indices, len(deltas) - 1)] != cassures))
+        if np.any(dans):
+            nouveaux = cassures[dans]
+        else:
+            forces_exactes, aires_exactes = loi(np.concatenate(
+                (deltas_forces, deltas_aires)))
+            nombre = len(points)
+            erreurs = np.concatenate((
+                (np.abs(aires_lues - aires_exactes[:nombre])
+                 + pentes_aires * np.abs(points[:, 0]
+                                         - forces_exactes[:nombre]))
+                / points[-1][1],
+                (np.abs(forces_lues - forces_exactes[nombre:])
+                 + pentes_forces * np.abs(points[:, 1]
+                                          - aires_exactes[nombre:]))
+                / points[-1][0]))
+            nouveaux = np.setdiff1d(np.concatenate(
+                (deltas_forces, deltas_aires))[erreurs > tolerance], deltas)
+            if len(nouveaux) == 0:
+                break
+        forces_nouveaux, aires_nouveaux = loi(nouveaux)
+        ordre = np.argsort(np.concatenate((deltas, nouveaux)), kind='stable')
+        deltas = np.concatenate((deltas, nouveaux))[ordre]
+        forces = np.concatenate((forces, forces_nouveaux))[ordre]
+        aires = np.concatenate((aires, aires_nouveaux))[ordre]
+    return deltas, forces, aires
+
+
+def evaluer_points(rayons_courbure, hauteurs, points, methode='points',
+                   interpolation=False, precision=1e-6, cache=None,
+                   tolerance=1e-6):
+    """
+    Calcule les forces et aires necessaires au score d'une surface.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    methode : str, optional
+        'courbe' pour construire la loi totale sur N points puis y chercher
+        les points, 'points' pour resoudre directement en chaque point,
+        'adaptative' pour construire la loi sur une grille resserree autour
+        des points puis l'interpoler.
+    interpolation : boolean, optional
+        Interpolation lineaire de la courbe, pour la methode 'courbe'.
+    precision : float, optional
+        Precision sur l'indentation en um, pour la methode 'points'.
+    cache : CacheCourbes, optional
+        Cache des tables de courbes, pour la methode 'courbe'.
+    tolerance : float, optional
+        Erreur relative d'interpolation pres des points, pour la methode
+        'adaptative'.
+
+    Returns
+    -------
+    forces_points : np.array of floats
+        Force correspondant a l'aire de chaque point.
+    aires_points : np.array of floats
+        Aire totale correspondant a la force de chaque point.
+
+    """
+    if methode == 'points':
+        return resoudre_points(rayons_courbure, hauteurs, points, precision)
+    if methode == 'courbe':
+        forces, aires = loi_totale(rayons_courbure, hauteurs, groupee=True,
+                                   cache=cache)
+        return get_forces_aires(forces, aires, points, interpolation)
+    if methode == 'adaptative':
+        _, forces, aires = loi_totale_adaptative(rayons_courbure, hauteurs,
+                                                 points, tolerance)
+        return get_forces_aires(forces, aires, points, True)
+    raise ValueError("Methode de calcul du score inconnue : " + str(methode))
+
+
+def derivees_points(rayons_courbure, hauteurs, points, cache=None):
+    """
+    Calcule les forces et aires des points et leurs derivees.
+
+    Avec F et A la force et l'aire totales a l'indentation delta, l'aire
+    obtenue a la force F_p d'un point est A(delta_p) avec F(delta_p) = F_p,
+    donc sa derivee par rapport a un parametre x d'une asperite est
+    dA/dx - A'(delta_p) * (dF/dx) / F'(delta_p), et de meme pour la force
+    obtenue a l'aire d'un point. Les indentations delta_p sont celles de la
+    grille de la loi totale, comme pour la methode 'courbe' sans
+    interpolation.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : CacheCourbes, optional
+        Cache des tables de courbes.
+
+    Returns
+    -------
+    forces_points : np.array of floats
+        Force correspondant a l'aire de chaque point.
+    aires_points : np.array of floats
+        Aire totale correspondant a la force de chaque point.
+    derivees_forces : np.array of floats
+        Tableau (2, points, asperites) des derivees de forces_points par
+        rapport a la hauteur puis au rayon de chaque asperite.
+    derivees_aires : np.array of floats
+        Tableau (2, points, asperites) des derivees de aires_points par
+        rapport a la hauteur puis au rayon de chaque asperite.
+
+    """
+    rayons_courbure = np.asarray(rayons_courbure, dtype=float)
+    hauteurs = np.asarray(hauteurs, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    hauteur_max = np.max(hauteurs)
+    forces, aires = loi_totale(rayons_courbure, hauteurs, groupee=True,
+                               cache=cache)
+    i = _indices_plus_proches(forces, points[:, 0])
+    j = _indices_plus_proches(aires, points[:, 1])
+    # Aire a la force de chaque point (indentations i), puis force a l'aire
+    # de chaque point (indentations j), calculees en une fois
+    indices = np.concatenate((i, j))
+    _, _, derivees_forces, derivees_aires, pentes = _derivees_penetrations(
+        rayons_courbure, hauteurs, hauteur_max / NOMBRE_POINTS * indices)
+    pentes_forces = pentes[0, :len(i)].reshape(-1, 1)
+    pentes_aires = pentes[1, len(i):].reshape(-1, 1)
+    rapport_aires = np.divide(pentes[1, :len(i)].reshape(-1, 1),
+                              pentes_forces,
+                              out=np.zeros_like(pentes_forces),
+                              where=pentes_forces > 0)
+    rapport_forces = np.divide(pentes[0, len(i):].reshape(-1, 1),
+                               pentes_aires,
+                               out=np.zeros_like(pentes_aires),
+                               where=pentes_aires > 0)
+    return (forces[j], aires[i],
+            derivees_forces[:, len(i):]
+            - rapport_forces * derivees_aires[:, len(i):],
+            derivees_aires[:, :len(i)]
+            - rapport_aires * derivees_forces[:, :len(i)])
+
+
+def gradient_score_hauteurs(rayons_courbure, hauteurs, points, cache=None):
+    """
+    Calcule le score d'une surface et sa derivee par rapport aux hauteurs.
+
+    Parameters
+    ----------
+    rayons_courbure : np.array of floats
+        Liste avec les rayons de courbure des spheres.
+    hauteurs : np.array of floats
+        Liste avec les hauteurs des spheres.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : CacheCourbes, optional
+        Cache des tables de courbes.
+
+    Returns
+    -------
+    score : float
+        Score de la surface, comme avec la methode 'courbe'.
+    gradient : np.array of floats
+        Derivee du score par rapport a la hauteur de chaque asperite.
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    forces_points, aires_points, derivees_forces, derivees_aires = (
+        derivees_points(rayons_courbure, hauteurs, points, cache))
+    score = score_points(points, forces_points, aires_points)
+    aire_0 = points[-1][1]
+    force_0 = points[-1][0]
+    gradient = np.mean(
+        -2 * (points[:, 1:] - aires_points.reshape(-1, 1)) / aire_0**2
+        * derivees_aires[0]
+        - 2 * (points[:, :1] - forces_points.reshape(-1, 1)) / force_0**2
+        * derivees_forces[0], axis=0)
+    return score, gradient
+
+
+def score_points(points, forces_points, aires_points):
+    """
+    Calcule le score par la methode des moindres carres normalises.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    forces_points : np.array of floats
+        Force obtenue a l'aire de chaque point.
+    aires_points : np.array of floats
+        Aire obtenue a la force de chaque point.
+
+    Returns
+    -------
+    float
+        Moyenne des ecarts quadratiques normalises.
+
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    aire_0 = points[-1][1]  # Aire pour normalisee
+    force_0 = points[-1][0]  # Force pour normalisee
+    return np.mean(((points[:, 1] - aires_points)/aire_0)**2
+                   + ((points[:, 0] - forces_points)/force_0)**2, axis=-1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+
+"""Executeurs qui repartissent les taches de l'algorithme genetique."""
+
+import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+
+nombre_coeurs = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+
+
+class ExecuteurSerie:
+    """
+    Classe qui execute les taches une par une dans le processus courant.
+
+    Sans cout de lancement ni de transmission des donnees, c'est le plus
+    rapide pour de petites populations.
+
+    ...
+
+    Attributes
+    ----------
+    nombre_travailleurs : integer
+        Nombre de taches executees a la fois, toujours 1.
+
+    Public methods
+    -------
+    map(fonction: function, taches: iterable) -> list
+        Applique une fonction a chaque tache.
+    fermer()
+        Libere les ressources de l'executeur.
+    """
+
+    mode = 'serie'
+
+    def __init__(self, nombre_travailleurs=None, initialisation=None,
+                 arguments=()):
+        """
+        Initialise une instance de ExecuteurSerie.
+
+        Parameters
+        ----------
+        nombre_travailleurs : integer, optional
+            Ignore, les taches sont executees une par une.
+        initialisation : function, optional
+            Fonction appelee une fois avant les taches.
+        arguments : tuple, optional
+            Arguments de la fonction d'initialisation.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.nombre_travailleurs = 1
+        if initialisation is not None:
+            initialisation(*arguments)
+
+    def map(self, fonction, taches):
+        """
+        Applique une fonction a chaque tache.
+
+        Parameters
+        ----------
+        fonction : function
+            Fonction a appliquer.
+        taches : iterable
+            Argument de chaque appel.
+
+        Returns
+        -------
+        list
+            Resultats, dans l'ordre des taches.
+
+        """
+        return [fonction(tache) for tache in taches]
+
+    def fermer(self):
+        """
+        Libere les ressources de l'executeur.
+
+        Returns
+        -------
+        None.
+
+        """
+
+    def __enter__(self):
+        """
+        Permet l'utilisation avec with.
+
+        Returns
+        -------
+        Executeur
+            L'executeur lui-meme.
+
+        """
+        return self
+
+    def __exit__(self, *exception):
+        """
+        Libere les ressources a la sortie du with.
+
+        Parameters
+        ----------
+        *exception : tuple
+            Informations sur une eventuelle exception.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fermer()
+
+
+class ExecuteurThreads(ExecuteurSerie):
+    """
+    Classe qui execute les taches dans des threads du processus courant.
+
+    Les threads partagent la memoire sans copie : c'est interessant quand
+    les calculs se font surtout dans NumPy, qui libere le GIL.
+
+    ...
+
+    Attributes
+    ----------
+    nombre_travailleurs : integer
+        Nombre de threads.
+    """
+
+    mode = 'threads'
+
+    def __init__(self, nombre_travailleurs=None, initialisation=None,
+                 arguments=()):
+        """
+        Initialise une instance de ExecuteurThreads.
+
+        Parameters
+        ----------
+        nombre_travailleurs : integer, optional
+            Nombre de threads, le nombre de coeurs par defaut.
+        initialisation : function, optional
+            Fonction appelee une fois, les threads partageant les globales.
+        arguments : tuple, optional
+            Arguments de la fonction d'initialisation.
+
+        Returns
+        -------
+        None.
+
+        """
+        super().__init__(None, initialisation, arguments)
+        self.nombre_travailleurs = nombre_travailleurs or nombre_coeurs
+        self.__threads = ThreadPoolExecutor(self.nombre_travailleurs)
+
+    def map(self, fonction, taches):
+        """
+        Applique une fonction a chaque tache.
+
+        Parameters
+        ----------
+        fonction : function
+            Fonction a appliquer.
+        taches : iterable
+            Argument de chaque appel.
+
+        Returns
+        -------
+        list
+            Resultats, dans l'ordre des taches.
+
+        """
+        return list(self.__threads.map(fonction, taches))
+
+    def fermer(self):
+        """
+        Arrete les threads.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.__threads.shutdown()
+
+
+class ExecuteurProcessus(ExecuteurSerie):
+    """
+    Classe qui execute les taches dans des processus de calcul.
+
+    Les taches et leurs resultats sont transmis entre processus : c'est
+    interessant quand les taches sont longues et peu vectorisees.
+
+    ...
+
+    Attributes
+    ----------
+    nombre_travailleurs : integer
+        Nombre de processus.
+    """
+
+    mode = 'processus'
+
+    def __init__(self, nombre_travailleurs=None, initialisation=None,
+                 arguments=()):
+        """
+        Initialise une instance de ExecuteurProcessus.
+
+        Parameters
+        ----------
+        nombre_travailleurs : integer, optional
+            Nombre de processus, le nombre de coeurs par defaut.
+        initialisation : function, optional
+            Fonction appelee une fois dans chaque processus.
+        arguments : tuple, optional
+            Arguments de la fonction d'initialisation.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.nombre_travailleurs = nombre_travailleurs or nombre_coeurs
+        self.__pool = multiprocessing.Pool(self.nombre_travailleurs,
+                                           initializer=initialisation,
+                                           initargs=arguments)
+
+    def map(self, fonction, taches):
+        """
+        Applique une fonction a chaque tache.
+
+        Parameters
+        ----------
+        fonction : function
+            Fonction a appliquer.
+        taches : iterable
+            Argument de chaque appel.
+
+        Returns
+        -------
+        list
+            Resultats, dans l'ordre des taches.
+
+        """
+        return self.__pool.map(fonction, taches)
+
+    def fermer(self):
+        """
+        Arrete les processus.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.__pool.terminate()
+        self.__pool.join()
+
+
+EXECUTEURS = {executeur.mode: executeur
+              for executeur in (ExecuteurSerie, ExecuteurThreads,
+                                ExecuteurProcessus)}
+
+
+def creer_executeur(mode='processus', nombre_travailleurs=None,
+                    initialisation=None, arguments=()):
+    """
+    Cree un executeur a partir du nom de son mode.
+
+    Parameters
+    ----------
+    mode : str, optional
+        'serie', 'threads' ou 'processus'.
+    nombre_travailleurs : integer, optional
+        Nombre de threads ou de processus, le nombre de coeurs par defaut.
+    initialisation : function, optional
+        Fonction appelee une fois par processus avant les taches.
+    arguments : tuple, optional
+        Arguments de la fonction d'initialisation.
+
+    Returns
+    -------
+    Executeur
+        Executeur du mode demande.
+
+    """
+    if mode not in EXECUTEURS:
+        raise ValueError("Mode d'execution inconnu : " + str(mode))
+    return EXECUTEURS[mode](nombre_travailleurs, initialisation, arguments)
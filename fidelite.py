@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+
+"""Evaluation multi-fidelite des enfants de l'algorithme genetique."""
+
+import numpy as np
+from individu import Individu
+from population import Population
+import algo_direct
+import genetique
+
+
+def scores_grossiers(population, points, pas):
+    """
+    Calcule les scores d'une population sur une grille d'indentation reduite.
+
+    Parameters
+    ----------
+    population : Population
+        Individus dont on calcule le score.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    pas : integer
+        Un point sur pas de la grille de loi_totale est garde.
+
+    Returns
+    -------
+    np.array of floats
+        Score approche de chaque individu.
+
+    """
+    forces, aires = algo_direct.loi_totale_population(
+        population.rayons, population.hauteurs, pas=pas)
+    # Entre deux points espaces, l'interpolation est plus proche du score fin
+    forces_points, aires_points = map(np.array, zip(*[
+        algo_direct.get_forces_aires(forces_individu, aires_individu, points,
+                                     True)
+        for forces_individu, aires_individu in zip(forces, aires)]))
+    return algo_direct.score_points(points, forces_points, aires_points)
+
+
+def correlation_rangs(scores_1, scores_2):
+    """
+    Calcule la correlation de Spearman entre deux classements.
+
+    Parameters
+    ----------
+    scores_1, scores_2 : np.array of floats
+        Scores des memes individus.
+
+    Returns
+    -------
+    float
+        Correlation des rangs, entre -1 et 1, nan avec moins de deux scores.
+
+    """
+    if len(scores_1) < 2:
+        return np.nan
+    rangs_1 = np.argsort(np.argsort(scores_1, kind='stable'), kind='stable')
+    rangs_2 = np.argsort(np.argsort(scores_2, kind='stable'), kind='stable')
+    return float(np.corrcoef(rangs_1, rangs_2)[0, 1])
+
+
+class Criblage:
+    """
+    Classe qui evalue les enfants d'abord grossierement, puis finement.
+
+    Les enfants sont notes sur une grille d'indentation reduite. Seuls ceux
+    dont le score grossier, diminue de la marge relative, peut passer la
+    prochaine selection sont notes sur la grille complete : les autres
+    seront elimines quel que soit leur score fin, tant que l'erreur
+    relative du score grossier reste sous la marge. Des que des enfants
+    ont ete notes deux fois, la marge vaut securite fois la plus grande
+    erreur relative observee.
+
+    Seulement pour la methode de score 'courbe' ; sinon tous les enfants
+    sont evalues normalement.
+
+    ...
+
+    Attributes
+    ----------
+    pas : integer
+        Un point sur pas de la grille de loi_totale est garde pour le score
+        grossier.
+    marge : float
+        Erreur relative admise sur le score grossier.
+    securite : float
+        Rapport entre la marge et la plus grande erreur observee.
+    erreur_max : float
+        Plus grande erreur relative observee du score grossier.
+    evaluations_fines : integer
+        Nombre d'enfants notes sur la grille complete.
+    evaluations_grossieres : integer
+        Nombre d'enfants notes sur la grille reduite.
+    historique : list of tuples
+        (enfants, enfants notes finement, correlation des rangs, erreur
+        relative maximale) de chaque generation.
+
+    Public methods
+    -------
+    evaluer(parents: Population, enfants: Population, points: list,
+            cache: CacheScores, pool: Executeur) -> np.array
+        Calcule les scores des enfants, fins pour ceux qui peuvent survivre.
+    parametres() -> dict
+        Obtient les arguments qui recreent le criblage actuel.
+    """
+
+    def __init__(self, nombre_points=400, marge=0.1, securite=2):
+        """
+        Initialise une instance de Criblage.
+
+        Parameters
+        ----------
+        nombre_points : integer, optional
+            Nombre approximatif de points de la grille reduite.
+        marge : float, optional
+            Erreur relative admise sur le score grossier, avant la premiere
+            comparaison.
+        securite : float, optional
+            Rapport entre la marge et la plus grande erreur observee.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.pas = max(algo_direct.NOMBRE_POINTS // nombre_points, 1)
+        self.marge = marge
+        self.securite = securite
+        self.erreur_max = None
+        self.evaluations_fines = 0
+        self.evaluations_grossieres = 0
+        self.historique = []
+
+    def evaluer(self, parents, enfants, points, cache=None, pool=None):
+        """
+        Calcule les scores des enfants, fins pour ceux qui peuvent survivre.
+
+        La selection suivante garde la meilleure moitie des parents et des
+        enfants : le seuil est le score du dernier garde, les parents et les
+        enfants deja notes finement comptant pour leur score fin.
+
+        Parameters
+        ----------
+        parents : Population
+            Parents selectionnes, aux scores fins.
+        enfants : Population
+            Enfants a evaluer, dont les scores sont modifies sur place.
+        points : list of couple of floats
+            Points (force, aire_totale) du cahier des charges.
+        cache : CacheScores, optional
+            Cache des scores fins de l'execution.
+        pool : Executeur, optional
+            Executeur cree par genetique.creer_pool.
+
+        Returns
+        -------
+        scores : np.array of floats
+            Score de chaque enfant, grossier pour les enfants elimines.
+
+        """
+        if Individu.methode_score != 'courbe' or len(enfants) == 0:
+            return genetique.evaluer_population(enfants, points, cache, pool)
+        scores = np.empty(len(enfants))
+        fins = np.zeros(len(enfants), dtype=bool)
+        if cache is not None:
+            cles = [cache.cle_genome(hauteurs, rayons) for hauteurs, rayons
+                    in zip(enfants.hauteurs, enfants.rayons)]
+            for i, cle in enumerate(cles):
+                score = cache.get_score(cle)
+                if score is not None:
+                    scores[i], fins[i] = score, True
+        grossiers = scores.copy()
+        a_cribler = np.flatnonzero(~fins)
+        if len(a_cribler):
+            grossiers[a_cribler] = scores_grossiers(
+                Population(enfants.hauteurs[a_cribler],
+                           enfants.rayons[a_cribler]), points, self.pas)
+            scores[a_cribler] = grossiers[a_cribler]
+            self.evaluations_grossieres += len(a_cribler)
+        gardes = round((len(parents) + len(enfants)) / 2)
+        while True:
+            seuil = np.sort(np.concatenate((parents.scores,
+                                            scores)))[gardes - 1]
+            a_affiner = np.flatnonzero(~fins & (scores * (1 - self.marge)
+                                                <= seuil))
+            if len(a_affiner) == 0:
+                break
+            affines = Population(enfants.hauteurs[a_affiner],
+                                 enfants.rayons[a_affiner])
+            # Enfants deja absents du cache : pas de seconde recherche
+            if cache is None:
+                scores[a_affiner] = genetique.evaluer_population(
+                    affines, points, pool=pool)
+            else:
+                scores[a_affiner] = genetique.evaluer_absents(
+                    affines, [cles[i] for i in a_affiner], points, cache,
+                    pool)
+            fins[a_affiner] = True
+            self.evaluations_fines += len(a_affiner)
+        # Enfants notes grossierement puis finement
+        compares = np.zeros(len(enfants), dtype=bool)
+        compares[a_cribler] = fins[a_cribler]
+        erreur = 0.0
+        if np.any(compares):
+            erreur = float(np.max(np.abs(grossiers[compares]
+                                         - scores[compares])
+                                  / scores[compares]))
+            self.erreur_max = max(erreur, self.erreur_max or 0)
+            self.marge = self.securite * self.erreur_max
+        self.historique.append((len(enfants), int(np.sum(compares)),
+                                correlation_rangs(grossiers[compares],
+                                                  scores[compares]),
+                                erreur))
+        enfants.scores = scores
+        return scores
+
+    def parametres(self):
+        """
+        Obtient les arguments qui recreent le criblage actuel.
+
+        Returns
+        -------
+        dict
+            Arguments de Criblage, avec la marge courante.
+
+        """
+        return {'nombre_points': algo_direct.NOMBRE_POINTS // self.pas,
+                'marge': self.marge, 'securite': self.securite}
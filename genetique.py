@@ -5,28 +5,669 @@
 
 import random
 import time
-import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker
 import csv
-import psutil
+import json
+import hashlib
+from collections import OrderedDict
 import numpy as np
 from functools import partial
-from individu import Individu
+from individu import Individu, PROBABILITE_MUTATION, PAS_MUTATION
+from population import Population, GenomesPartages
+from executeurs import EXECUTEURS, creer_executeur, nombre_coeurs
+from adaptation import MutationAdaptative
+from recherche_locale import RechercheLocale
+import fidelite
 import affichage
 import algo_direct
 
-nombre_coeurs = psutil.cpu_count(logical=False)
 
+class CacheScores:
+    """
+    Cache LRU des scores, independant de l'ordre des asperites.
+
+    La loi de contact ne depend que de l'ensemble des couples (hauteur,
+    rayon) : deux Individus ayant les memes couples dans un ordre different
+    ont le meme score. Un cache n'est valable que pour un seul cahier des
+    charges et une seule methode de calcul du score.
+
+    ...
 
-def creer_individu(points, _):
+    Attributes
+    ----------
+    taille_max : integer
+        Nombre maximal de scores conserves.
+    succes : integer
+        Nombre de scores trouves dans le cache.
+    echecs : integer
+        Nombre de scores absents du cache.
+
+    Public methods
+    -------
+    cle(individu: Individu) -> bytes
+        Calcule la cle canonique d'un individu.
+    cle_genome(hauteurs: np.array, rayons: np.array) -> bytes
+        Calcule la cle canonique d'un genome.
+    get_score(cle: bytes) -> float
+        Obtient un score du cache, None s'il est absent.
+    set_score(cle: bytes, score: float)
+        Ajoute un score au cache.
     """
-    Cree un individu de la premiere generation.
+
+    def __init__(self, taille_max=100000):
+        """
+        Initialise une instance de CacheScores.
+
+        Parameters
+        ----------
+        taille_max : integer, optional
+            Nombre maximal de scores conserves.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.taille_max = taille_max
+        self.succes = 0
+        self.echecs = 0
+        self.__scores = OrderedDict()
+
+    def __len__(self):
+        """
+        Donne le nombre de scores conserves.
+
+        Returns
+        -------
+        integer
+            Nombre de scores dans le cache.
+
+        """
+        return len(self.__scores)
+
+    @staticmethod
+    def cle(individu):
+        """
+        Calcule la cle canonique d'un individu.
+
+        Parameters
+        ----------
+        individu : Individu
+            Individu dont on calcule la cle.
+
+        Returns
+        -------
+        bytes
+            Empreinte des couples (hauteur, rayon) tries.
+
+        """
+        return CacheScores.cle_genome(individu.get_hauteurs(),
+                                      individu.get_rayons_courbure())
+
+    @staticmethod
+    def cle_genome(hauteurs, rayons):
+        """
+        Calcule la cle canonique d'un genome, comme une ligne de Population.
+
+        Parameters
+        ----------
+        hauteurs : np.array of integers
+            Hauteurs des asperites.
+        rayons : np.array of integers
+            Rayons de courbure des asperites.
+
+        Returns
+        -------
+        bytes
+            Empreinte des couples (hauteur, rayon) tries.
+
+        """
+        hauteurs = np.asarray(hauteurs, dtype=np.float64)
+        rayons = np.asarray(rayons, dtype=np.float64)
+        ordre = np.lexsort((rayons, hauteurs))
+        genome = np.concatenate((hauteurs[ordre], rayons[ordre]))
+        return hashlib.blake2b(genome.tobytes(), digest_size=16).digest()
+
+    def get_score(self, cle):
+        """
+        Obtient un score du cache.
+
+        Parameters
+        ----------
+        cle : bytes
+            Cle canonique de l'individu.
+
+        Returns
+        -------
+        float
+            Score de l'individu, None s'il n'est pas dans le cache.
+
+        """
+        score = self.__scores.get(cle)
+        if score is None:
+            self.echecs += 1
+        else:
+            self.succes += 1
+            self.__scores.move_to_end(cle)  # Utilise le plus recemment
+        return score
+
+    def set_score(self, cle, score):
+        """
+        Ajoute un score au cache.
+
+        Parameters
+        ----------
+        cle : bytes
+            Cle canonique de l'individu.
+        score : float
+            Score de l'individu.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.__scores[cle] = score
+        self.__scores.move_to_end(cle)
+        while len(self.__scores) > self.taille_max:
+            self.__scores.popitem(last=False)  # Le moins recemment utilise
+
+
+class CriteresArret:
+    """
+    Regles d'arret de l'algorithme genetique.
+
+    L'algorithme s'arrete des qu'une des regles definies est verifiee ; une
+    regle a None n'est pas utilisee. Par defaut, seule la limite de 2000
+    generations est active.
+
+    ...
+
+    Attributes
+    ----------
+    score_cible : float
+        Score en dessous duquel le cahier des charges est atteint.
+    fenetre : integer
+        Nombre de generations sans amelioration du meilleur score.
+    seuil_relatif : float
+        Amelioration relative minimale du meilleur score sur fenetre
+        generations (20 si fenetre n'est pas defini).
+    duree_max : float
+        Duree maximale de l'execution, en secondes.
+    evaluations_max : integer
+        Nombre maximal d'individus evalues.
+    generations_max : integer
+        Nombre maximal de generations.
+    evaluations : integer
+        Nombre d'individus evalues depuis le demarrage.
+    critere : str
+        Nom de la regle qui a arrete l'algorithme, None avant l'arret.
+    historique : list of floats
+        Meilleur score de chaque generation verifiee.
+
+    Public methods
+    -------
+    demarrer(evaluations: int, duree: float)
+        Remet a zero, ou reprend, la duree et le nombre d'evaluations.
+    duree() -> float
+        Obtient la duree ecoulee depuis le demarrage.
+    parametres() -> dict
+        Obtient les regles, pour recreer les memes criteres.
+    ajouter_evaluations(nombre: int)
+        Compte des individus evalues.
+    verifier(liste_score: list of floats) -> str
+        Obtient la regle verifiee, None si l'algorithme continue.
+    """
+
+    def __init__(self, score_cible=None, fenetre=None, seuil_relatif=None,
+                 duree_max=None, evaluations_max=None, generations_max=2000):
+        """
+        Initialise une instance de CriteresArret.
+
+        Parameters
+        ----------
+        score_cible : float, optional
+            Score en dessous duquel le cahier des charges est atteint.
+        fenetre : integer, optional
+            Nombre de generations sans amelioration du meilleur score.
+        seuil_relatif : float, optional
+            Amelioration relative minimale du meilleur score sur fenetre
+            generations.
+        duree_max : float, optional
+            Duree maximale de l'execution, en secondes.
+        evaluations_max : integer, optional
+            Nombre maximal d'individus evalues.
+        generations_max : integer, optional
+            Nombre maximal de generations.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.score_cible = score_cible
+        self.fenetre = fenetre
+        self.seuil_relatif = seuil_relatif
+        self.duree_max = duree_max
+        self.evaluations_max = evaluations_max
+        self.generations_max = generations_max
+        self.demarrer()
+
+    def demarrer(self, evaluations=0, duree=0.0):
+        """
+        Remet a zero, ou reprend, la duree et le nombre d'evaluations.
+
+        Parameters
+        ----------
+        evaluations : integer, optional
+            Nombre d'individus deja evalues, pour une reprise.
+        duree : float, optional
+            Duree deja ecoulee en secondes, pour une reprise.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.evaluations = evaluations
+        self.critere = None
+        self.historique = []
+        self.__debut = time.perf_counter() - duree
+
+    def duree(self):
+        """
+        Obtient la duree ecoulee depuis le demarrage.
+
+        Returns
+        -------
+        float
+            Duree en secondes.
+
+        """
+        return time.perf_counter() - self.__debut
+
+    def parametres(self):
+        """
+        Obtient les regles, pour recreer les memes criteres.
+
+        Returns
+        -------
+        dict
+            Arguments de CriteresArret.
+
+        """
+        return {'score_cible': self.score_cible, 'fenetre': self.fenetre,
+                'seuil_relatif': self.seuil_relatif,
+                'duree_max': self.duree_max,
+                'evaluations_max': self.evaluations_max,
+                'generations_max': self.generations_max}
+
+    def ajouter_evaluations(self, nombre):
+        """
+        Compte des individus evalues.
+
+        Parameters
+        ----------
+        nombre : integer
+            Nombre d'individus evalues.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.evaluations += nombre
+
+    def verifier(self, liste_score):
+        """
+        Obtient la regle d'arret verifiee apres une generation.
+
+        Parameters
+        ----------
+        liste_score : list of floats
+            Meilleur score de chaque generation deja calculee.
+
+        Returns
+        -------
+        str
+            Nom de la regle verifiee ('score_cible', 'fenetre',
+            'seuil_relatif', 'duree_max', 'evaluations_max' ou
+            'generations_max'), None si l'algorithme continue.
+
+        """
+        self.historique = liste_score
+        fenetre = self.fenetre or 20
+        if (self.score_cible is not None and liste_score
+                and liste_score[-1] <= self.score_cible):
+            self.critere = 'score_cible'
+        elif (self.fenetre is not None and len(liste_score) > fenetre
+              and not liste_score[-1] < liste_score[-fenetre - 1]):
+            self.critere = 'fenetre'
+        elif (self.seuil_relatif is not None and len(liste_score) > fenetre
+              and (liste_score[-fenetre - 1] - liste_score[-1])
+              < self.seuil_relatif * liste_score[-fenetre - 1]):
+            self.critere = 'seuil_relatif'
+        elif (self.duree_max is not None
+              and self.duree() >= self.duree_max):
+            self.critere = 'duree_max'
+        elif (self.evaluations_max is not None
+              and self.evaluations >= self.evaluations_max):
+            self.critere = 'evaluations_max'
+        elif (self.generations_max is not None
+              and len(liste_score) >= self.generations_max):
+            self.critere = 'generations_max'
+        return self.critere
+
+
+class Sauvegarde:
+    """
+    Points de reprise periodiques d'une execution de genetique.
+
+    Chaque point de reprise est un fichier .npz compresse, ecrit dans un
+    fichier temporaire puis renomme : une interruption pendant l'ecriture
+    laisse intact le point de reprise precedent.
+
+    ...
+
+    Attributes
+    ----------
+    fichier : str
+        Fichier .npz du point de reprise, remplace a chaque ecriture.
+    periode_generations : integer
+        Nombre de generations entre deux ecritures, ou None.
+    periode_secondes : float
+        Duree entre deux ecritures, en secondes, ou None.
+
+    Public methods
+    -------
+    demarrer()
+        Remet a zero la duree depuis la derniere ecriture.
+    a_ecrire(generation: int) -> bool
+        Indique si un point de reprise doit etre ecrit.
+    ecrire(etat: dict)
+        Ecrit un point de reprise.
+    lire(fichier: str) -> dict
+        Lit un point de reprise.
+    """
+
+    def __init__(self, fichier, periode_generations=None,
+                 periode_secondes=None):
+        """
+        Initialise une instance de Sauvegarde.
+
+        Parameters
+        ----------
+        fichier : str
+            Fichier .npz du point de reprise.
+        periode_generations : integer, optional
+            Nombre de generations entre deux ecritures.
+        periode_secondes : float, optional
+            Duree entre deux ecritures, en secondes.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fichier = fichier
+        self.periode_generations = periode_generations
+        self.periode_secondes = periode_secondes
+        self.demarrer()
+
+    def demarrer(self):
+        """
+        Remet a zero la duree depuis la derniere ecriture.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.__derniere = time.perf_counter()
+
+    def a_ecrire(self, generation):
+        """
+        Indique si un point de reprise doit etre ecrit.
+
+        Parameters
+        ----------
+        generation : integer
+            Nombre de generations deja calculees.
+
+        Returns
+        -------
+        boolean
+            True si une des periodes est atteinte.
+
+        """
+        return ((self.periode_generations is not None
+                 and generation % self.periode_generations == 0)
+                or (self.periode_secondes is not None
+                    and time.perf_counter() - self.__derniere
+                    >= self.periode_secondes))
+
+    def ecrire(self, etat):
+        """
+        Ecrit un point de reprise.
+
+        Parameters
+        ----------
+        etat : dict
+            Tableaux a sauvegarder, par nom.
+
+        Returns
+        -------
+        None.
+
+        """
+        temporaire = self.fichier + '.tmp'
+        with open(temporaire, 'wb') as fichier:
+            np.savez_compressed(fichier, **etat)
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        os.replace(temporaire, self.fichier)
+        self.demarrer()
+
+    @staticmethod
+    def lire(fichier):
+        """
+        Lit un point de reprise.
+
+        Parameters
+        ----------
+        fichier : str
+            Fichier .npz du point de reprise.
+
+        Returns
+        -------
+        dict
+            Tableaux sauvegardes, par nom.
+
+        """
+        with np.load(fichier) as archive:
+            return {nom: archive[nom] for nom in archive.files}
+
+
+# Points du cahier des charges, definis une fois par processus de calcul
+_points_processus = None
+
+
+def _initialiser_processus(points, cache, configuration):
+    """
+    Initialise un processus de calcul une fois pour toute l'execution.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : algo_direct.CacheCourbes
+        Cache des tables de courbes deja rempli.
+    configuration : dict
+        Attributs de classe d'Individu (nombre d'asperites, methode de
+        score...), pour que les processus lances par spawn aient les memes.
+
+    Returns
+    -------
+    None.
+
+    """
+    global _points_processus
+    _points_processus = points
+    algo_direct.installer_cache(cache)
+    for nom, valeur in configuration.items():
+        setattr(Individu, nom, valeur)
+
+
+def configuration_individu():
+    """
+    Obtient les attributs de classe qui parametrent les Individus.
+
+    Returns
+    -------
+    dict
+        Valeur de chaque attribut de classe d'Individu.
+
+    """
+    return {nom: getattr(Individu, nom)
+            for nom in ('nombre_asperites', 'changement_rayons',
+                        'methode_score', 'interpolation', 'precision',
+                        'tolerance')}
+
+
+def creer_pool(points, nombre_processus=None, mode='processus'):
+    """
+    Cree un executeur reutilisable pour toute une execution.
+
+    Les points du cahier des charges, les tables de courbes et la
+    configuration des Individus sont transmis une seule fois, a la creation
+    des processus. L'executeur s'utilise comme gestionnaire de contexte, par
+    exemple autour de plusieurs appels a genetique avec les memes points.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+    mode : str, optional
+        'serie', 'threads' ou 'processus'.
+
+    Returns
+    -------
+    Executeur
+        Executeur des taches de calcul.
+
+    """
+    # Suivi des blocs de memoire partagee commun a tous les processus : seul
+    # le processus qui cree un bloc le libere
+    resource_tracker.ensure_running()
+    return creer_executeur(mode, nombre_processus, _initialiser_processus,
+                           (points, algo_direct.cache_courbes,
+                            configuration_individu()))
+
+
+def choisir_mode(points, taille_population=50, vectorise=False,
+                 nombre_processus=None):
+    """
+    Choisit l'executeur le plus rapide en chronometrant une generation.
+
+    Chaque mode calcule une generation a partir de la meme population
+    aleatoire, apres une generation de mise en route qui n'est pas
+    chronometree (lancement des processus, premieres tables). Vectorise
+    avec la methode de score 'courbe', une generation n'utilise pas
+    l'executeur : le mode 'serie' est choisi sans chronometrer.
 
     Parameters
     ----------
     points : list of couple of floats
         Points (force, aire_totale) du cahier des charges.
-    _ : integer
-        Numero de l'element dans la liste, sert pour l'utilisation de pool.map.
+    taille_population : integer, optional
+        Taille de la population de l'execution.
+    vectorise : boolean, optional
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+
+    Returns
+    -------
+    mode : str
+        Mode de l'executeur le plus rapide.
+    durees : dict
+        Duree de la generation chronometree pour chaque mode, en secondes,
+        vide sans chronometrage.
+
+    """
+    if vectorise and Individu.methode_score == 'courbe':
+        return 'serie', {}
+    with creer_pool(points, mode='serie') as pool:
+        population = creer_population(taille_population, points, None,
+                                      vectorise, pool)
+    durees = {}
+    for mode in EXECUTEURS:
+        with creer_pool(points, nombre_processus, mode) as pool:
+            nouvelle_generation(population, points, None, vectorise, pool)
+            debut = time.perf_counter()
+            nouvelle_generation(population, points, None, vectorise, pool)
+            durees[mode] = time.perf_counter() - debut
+    return min(durees, key=durees.get), durees
+
+
+def _score_genome(points, genome):
+    """
+    Calcule le score d'un genome avec la methode des Individus.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    genome : couple of np.array of integers
+        Hauteurs et rayons de courbure des asperites.
+
+    Returns
+    -------
+    float
+        Score du genome.
+
+    """
+    hauteurs, rayons = genome
+    individu = Individu(hauteurs=hauteurs, rayons=rayons)
+    individu.set_score(points)
+    return individu.get_score()
+
+
+def _score_processus(genome):
+    """
+    Calcule le score d'un genome dans un processus de calcul.
+
+    Parameters
+    ----------
+    genome : couple of np.array of integers
+        Hauteurs et rayons de courbure des asperites.
+
+    Returns
+    -------
+    float
+        Score du genome.
+
+    """
+    return _score_genome(_points_processus, genome)
+
+
+def creer_individu(points, graine=None):
+    """
+    Cree un individu de la premiere generation.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges, ou None pour ne
+        pas calculer le score.
+    graine : np.random.SeedSequence, optional
+        Graine propre a l'individu, sert pour l'utilisation de pool.map.
+        Aleatoire par defaut.
 
     Returns
     -------
@@ -34,12 +675,14 @@ def creer_individu(points, _):
         Individu creer aleatoirement.
 
     """
-    individu = Individu()
-    individu.set_score(points)
+    individu = Individu(rng=np.random.default_rng(graine))
+    if points is not None:
+        individu.set_score(points)
     return individu
 
 
-def creer_population(taille_population, points):
+def creer_population(taille_population, points, cache=None, vectorise=False,
+                     pool=None, graine=None):
     """
     Cree la population entiere pour la premiere generation.
 
@@ -49,101 +692,392 @@ def creer_population(taille_population, points):
         Nombre d'individus dans la population.
     points : list of couple of floats
         Points (force, aire_totale) du cahier des charges.
+    cache : CacheScores, optional
+        Cache des scores de l'execution.
+    vectorise : boolean, optional
+        Si True, les genomes sont tires d'un coup sous forme de tableaux au
+        lieu d'etre crees individu par individu dans des processus.
+    pool : Executeur, optional
+        Executeur cree par creer_pool, reutilise d'un appel a l'autre. Sans
+        executeur, un pool de processus temporaire est cree si besoin.
+    graine : np.random.SeedSequence, optional
+        Graine de la population : chaque individu recoit sa propre suite
+        aleatoire, independante de l'executeur. Aleatoire par defaut.
 
     Returns
     -------
-    population : list of Individus
-        Liste de l'ensemble des N individus.
+    population : Population
+        Ensemble des N individus.
 
     """
-    # On cree une version de la fonction creer_individu sans arguments d'entree
-    creer_individu_partiel = partial(creer_individu, points)
-
-    with multiprocessing.Pool() as pool:
-        # Utilisation de pool.map pour créer tous les individus en parallèle
-        population = pool.map(creer_individu_partiel, range(taille_population))
+    if not isinstance(graine, np.random.SeedSequence):
+        graine = np.random.SeedSequence(graine)
+    if vectorise:
+        population = Population.aleatoire(taille_population,
+                                          np.random.default_rng(graine))
+    elif pool is None:
+        with creer_pool(points) as pool:
+            return creer_population(taille_population, points, cache,
+                                    vectorise, pool, graine)
+    else:
+        # On cree une version de la fonction creer_individu sans le score
+        # Les scores sont calcules ensuite pour toute la population a la fois
+        creer_individu_partiel = partial(creer_individu, None)
+        # Utilisation de pool.map pour créer les individus en parallèle
+        population = Population.depuis_individus(
+            pool.map(creer_individu_partiel,
+                     graine.spawn(taille_population)))
+    evaluer_population(population, points, cache, pool)
     return population
 
 
+def evaluer_population(population, points, cache=None, pool=None):
+    """
+    Calcule en une seule fois les scores de toute une population.
+
+    Avec la methode 'courbe', les lois de toutes les surfaces sont obtenues
+    par un produit matriciel (BLAS multithread) entre les effectifs
+    d'asperites par ecart de hauteur et la table des courbes unitaires, au
+    lieu d'un appel a loi_totale par individu. Les tableaux de genomes
+    d'une Population sont utilises tels quels.
+
+    Parameters
+    ----------
+    population : list of Individus or Population
+        Individus dont on calcule le score.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : CacheScores, optional
+        Cache des scores : seuls les individus absents du cache, et une seule
+        fois par genome, sont evalues.
+    pool : Executeur, optional
+        Executeur cree par creer_pool pour les memes points : les methodes
+        de score qui ne se calculent pas par lot y sont reparties.
+
+    Returns
+    -------
+    scores : np.array of floats
+        Score de chaque individu, dans l'ordre de la population.
+
+    """
+    if len(population) == 0:
+        return np.array([])
+    if not isinstance(population, Population):
+        scores = evaluer_population(Population.depuis_individus(population),
+                                    points, cache, pool)
+        for individu, score in zip(population, scores):
+            individu.set_score(points, score=score)
+        return scores
+    if cache is not None:
+        return _evaluer_population_cache(population, points, cache, pool)
+    genomes = zip(population.hauteurs, population.rayons)
+    if Individu.methode_score != 'courbe' and pool is not None:
+        # Les points du cahier des charges sont deja dans les processus
+        scores = pool.map(_score_processus, genomes)
+    elif Individu.methode_score != 'courbe':
+        # Les autres methodes se calculent genome par genome
+        scores = [_score_genome(points, genome) for genome in genomes]
+    else:
+        forces, aires = algo_direct.loi_totale_population(population.rayons,
+                                                          population.hauteurs)
+        forces_points, aires_points = map(np.array, zip(*[
+            algo_direct.get_forces_aires(forces_individu, aires_individu,
+                                         points, Individu.interpolation)
+            for forces_individu, aires_individu in zip(forces, aires)]))
+        scores = algo_direct.score_points(points, forces_points, aires_points)
+    population.scores = np.asarray(scores, dtype=float)
+    return population.scores
+
+
+def _evaluer_population_cache(population, points, cache, pool=None):
+    """
+    Calcule les scores d'une population en s'appuyant sur un cache.
+
+    Parameters
+    ----------
+    population : Population
+        Individus dont on calcule le score.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : CacheScores
+        Cache des scores.
+    pool : Executeur, optional
+        Executeur cree par creer_pool.
+
+    Returns
+    -------
+    scores : np.array of floats
+        Score de chaque individu, dans l'ordre de la population.
+
+    """
+    cles = [cache.cle_genome(hauteurs, rayons) for hauteurs, rayons
+            in zip(population.hauteurs, population.rayons)]
+    scores = np.empty(len(population))
+    absents = []
+    for i, cle in enumerate(cles):
+        score = cache.get_score(cle)
+        if score is not None:
+            scores[i] = score
+        else:
+            absents.append(i)
+    scores[absents] = evaluer_absents(
+        Population(population.hauteurs[absents], population.rayons[absents]),
+        [cles[i] for i in absents], points, cache, pool)
+    population.scores = scores
+    return scores
+
+
+def evaluer_absents(population, cles, points, cache, pool=None):
+    """
+    Calcule et met en cache les scores de genomes absents du cache.
+
+    Le cache n'est pas consulte : l'appelant y a deja cherche chaque
+    genome. Un genome present plusieurs fois n'est evalue qu'une fois.
+
+    Parameters
+    ----------
+    population : Population
+        Individus absents du cache.
+    cles : list of bytes
+        Cle de chaque individu, donnee par CacheScores.cle_genome.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : CacheScores
+        Cache ou ranger les nouveaux scores.
+    pool : Executeur, optional
+        Executeur cree par creer_pool.
+
+    Returns
+    -------
+    scores : np.array of floats
+        Score de chaque individu, dans l'ordre de la population.
+
+    """
+    a_evaluer = {}  # Premiere ligne de chaque genome
+    for i, cle in enumerate(cles):
+        a_evaluer.setdefault(cle, i)
+    lignes = list(a_evaluer.values())
+    nouveaux = evaluer_population(
+        Population(population.hauteurs[lignes], population.rayons[lignes]),
+        points, pool=pool)
+    nouveaux = dict(zip(a_evaluer, nouveaux))
+    for cle, score in nouveaux.items():
+        cache.set_score(cle, score)
+    scores = np.array([nouveaux[cle] for cle in cles], dtype=float)
+    population.scores = scores
+    return scores
+
+
 def selection(population):
     """
     Selectionne les meilleurs individus de la population.
 
     Parameters
     ----------
-    population : list of Individus
+    population : list of Individus or Population
         Population entiere d'une generation.
 
     Returns
     -------
-    population_selectionnee : list of Individus
+    population_selectionnee : list of Individus or Population
         Population avec les individus selectionnes.
 
     """
+    if isinstance(population, Population):
+        return population.selection()
     population_triee = sorted(population,
                               key=lambda individu: individu.get_score())
     population_selectionnee = population_triee[:round(len(population)/2)]
     return population_selectionnee
 
 
-def individu_enfant(nouvelle_population, points, i):
+def _enfant_partage(descripteur, score, tache):
     """
-    Cree un individu enfant.
+    Cree un individu enfant a partir des parents en memoire partagee.
 
     Parameters
     ----------
-    nouvelle_population : list of Individus
-        Population des parents de la generation precedente.
-    points : list of couple of floats
-        Points (force, aire_totale) du cahier des charges.
-    i : integer
-        Numero de l'individu enfant.
+    descripteur : tuple
+        Descripteur du bloc GenomesPartages contenant les parents.
+    score : boolean
+        Si True, le score de l'enfant est calcule dans le processus.
+    tache : tuple
+        (i, graine, probabilite, pas) : l'enfant est issu des parents i et
+        i+1, avec un generateur aleatoire initialise par la
+        np.random.SeedSequence, et mute avec la probabilite et le pas.
 
     Returns
     -------
-    individu : Individu
-        Individu enfant.
+    hauteurs : np.array of integers
+        Hauteurs de l'individu enfant.
+    rayons : np.array of integers
+        Rayons de l'individu enfant.
+    score : float
+        Score de l'enfant, ou None s'il n'est pas calcule.
 
     """
-    individu = mutation(Individu(nouvelle_population[i],
-                                 nouvelle_population[i+1]),
-                        points)
-    return individu
+    i, graine, probabilite, pas = tache
+    hauteurs, rayons = GenomesPartages.lire(descripteur)
+    rng = np.random.default_rng(graine)
+    individu = mutation(Individu(Individu(hauteurs=hauteurs[i],
+                                          rayons=rayons[i]),
+                                 Individu(hauteurs=hauteurs[i+1],
+                                          rayons=rayons[i+1]), rng=rng),
+                        _points_processus if score else None, rng,
+                        probabilite, pas)
+    return (individu.get_hauteurs(), individu.get_rayons_courbure(),
+            individu.get_score() if score else None)
+
+
+def enfants_partages(parents, pool, genomes, graine=None, taux=None,
+                     pas=PAS_MUTATION, cache=None):
+    """
+    Cree les individus enfants dans les processus de calcul.
 
+    Les parents sont ecrits en memoire partagee : chaque tache ne transmet
+    que l'indice du premier parent et une graine, et ne renvoie que le
+    genome de l'enfant. Sans cache, il renvoie aussi son score avec les
+    methodes 'points' et 'adaptative', qui ne se calculent pas par lot ;
+    avec un cache, seuls les enfants absents du cache sont ensuite
+    evalues.
+
+    Parameters
+    ----------
+    parents : Population
+        Individus selectionnes de la generation precedente.
+    pool : Executeur
+        Executeur cree par creer_pool.
+    genomes : GenomesPartages
+        Bloc de memoire partagee d'au moins len(parents) individus.
+    graine : np.random.SeedSequence, optional
+        Graine de la generation, dont chaque enfant recoit une suite
+        aleatoire propre. Aleatoire par defaut.
+    taux : np.array of floats, optional
+        Probabilite de mutation de chaque enfant, 0.4 par defaut.
+    pas : integer, optional
+        Pas maximal de mutation des hauteurs, 5um par defaut.
+    cache : CacheScores, optional
+        Cache des scores de l'execution, consulte avant toute evaluation.
+
+    Returns
+    -------
+    enfants : Population
+        Individus enfants, non evalues.
+    scores : list of floats
+        Score de chaque enfant, ou None s'il n'est pas calcule.
 
-def nouvelle_generation(population, points):
+    """
+    genomes.ecrire(parents)
+    score = (cache is None
+             and Individu.methode_score in ('points', 'adaptative'))
+    if graine is None:
+        graine = np.random.SeedSequence()
+    graines = graine.spawn(max(len(parents) - 1, 0))
+    if taux is None:
+        taux = np.full(len(graines), PROBABILITE_MUTATION)
+    resultats = pool.map(partial(_enfant_partage, genomes.descripteur(),
+                                 score),
+                         zip(range(len(parents) - 1), graines,
+                             taux.tolist(), [pas] * len(graines)))
+    nombre_asperites = parents.hauteurs.shape[1]
+    enfants = Population(
+        np.array([hauteurs for hauteurs, _, _ in resultats],
+                 dtype=parents.hauteurs.dtype).reshape(-1, nombre_asperites),
+        np.array([rayons for _, rayons, _ in resultats],
+                 dtype=parents.rayons.dtype).reshape(-1, nombre_asperites))
+    enfants.taux = taux
+    return enfants, [score for _, _, score in resultats]
+
+
+def nouvelle_generation(population, points, cache=None, vectorise=False,
+                        pool=None, genomes=None, graine=None,
+                        adaptation=None, criblage=None):
     """
     Cree la nouvelle generation.
 
     Parameters
     ----------
-    population : list of Individus
+    population : Population
         Population de l'ancienne generation.
     points : list of couple of floats
         Points (force, aire_totale) du cahier des charges.
+    cache : CacheScores, optional
+        Cache des scores de l'execution.
+    vectorise : boolean, optional
+        Si True, croisements et mutations s'appliquent d'un coup aux tableaux
+        de la population au lieu d'etre faits enfant par enfant dans des
+        processus.
+    pool : Executeur, optional
+        Executeur cree par creer_pool, reutilise d'une generation a l'autre.
+        Sans executeur, un pool de processus temporaire est cree si besoin.
+    genomes : GenomesPartages, optional
+        Bloc de memoire partagee par lequel les parents sont transmis aux
+        processus. Sans bloc, un bloc temporaire est cree si besoin.
+    graine : np.random.SeedSequence, optional
+        Graine de la generation : a graine egale, les enfants sont les memes
+        quels que soient l'executeur et son nombre de processus. Aleatoire
+        par defaut.
+    adaptation : MutationAdaptative, optional
+        Reglage de la mutation, mis a jour apres la generation. Probabilite
+        0.4 et pas de 5um par defaut.
+    criblage : fidelite.Criblage, optional
+        Evaluation grossiere des enfants, seuls ceux qui peuvent survivre
+        etant notes finement, avec ou sans vectorisation. Seulement pour
+        la methode de score 'courbe'.
 
     Returns
     -------
-    nouvelle_population : list of Individus
+    nouvelle_population : Population
         Population de la nouvelle generation.
 
     """
     nouvelle_population = selection(population)
     taille_population = len(nouvelle_population)
-    # Fonction individu_enfant avec que l'indice de l'individu en entree
-    individu_enfant_partiel = partial(individu_enfant, nouvelle_population,
-                                      points)
+    if adaptation is None:
+        adaptation = MutationAdaptative()
+    if graine is None:
+        graine = np.random.SeedSequence()
+    if vectorise:
+        taux = adaptation.taux_enfants(nouvelle_population.taux, graine)
+        rng = np.random.default_rng(graine)
+        population_enfant = nouvelle_population.croisement(rng)
+        population_enfant.mutation(taux, rng, adaptation.get_pas())
+        population_enfant.taux = taux
+    elif pool is None:
+        with creer_pool(points) as pool:
+            return nouvelle_generation(population, points, cache, vectorise,
+                                       pool, genomes, graine, adaptation,
+                                       criblage)
+    elif genomes is None:
+        with GenomesPartages(taille_population,
+                             population.hauteurs.shape[1]) as genomes:
+            return nouvelle_generation(population, points, cache, vectorise,
+                                       pool, genomes, graine, adaptation,
+                                       criblage)
+    else:
+        # Utilisation de pool.map pour créer les individus en parallèle, les
+        # parents etant lus en memoire partagee
+        population_enfant, scores = enfants_partages(
+            nouvelle_population, pool, genomes, graine,
+            adaptation.taux_enfants(nouvelle_population.taux, graine),
+            adaptation.get_pas(), cache)
+    if not vectorise and None not in scores:
+        # Scores deja calcules dans les processus, sans cache
+        population_enfant.scores = np.array(scores, dtype=float)
+    elif criblage is not None:
+        criblage.evaluer(nouvelle_population, population_enfant, points,
+                         cache, pool)
+    else:
+        evaluer_population(population_enfant, points, cache, pool)
+    adaptation.mettre_a_jour(nouvelle_population.scores,
+                             population_enfant.scores, population_enfant.taux)
 
-    with multiprocessing.Pool() as pool:
-        # Utilisation de pool.map pour créer tous les individus en parallèle
-        population_enfant = pool.map(individu_enfant_partiel,
-                                     range(taille_population - 1))
-
-    nouvelle_population = nouvelle_population + population_enfant
+    nouvelle_population = nouvelle_population.concatener(population_enfant)
     return nouvelle_population
 
 
-def mutation(individu, points):
+def mutation(individu, points, rng=None, probabilite=PROBABILITE_MUTATION,
+             pas=PAS_MUTATION):
     """
     Realise les potentielles mutations sur un individu.
 
@@ -152,7 +1086,14 @@ def mutation(individu, points):
     individu : Individu
         Individu pouvant subir une mutation.
     points : list of couple of floats
-        Points (force, aire_totale) du cahier des charges.
+        Points (force, aire_totale) du cahier des charges, ou None pour ne
+        pas calculer le score.
+    rng : np.random.Generator, optional
+        Generateur de nombres aleatoires, un nouveau par defaut.
+    probabilite : float, optional
+        Probabilite de mutation d'un gene, 0.4 par defaut.
+    pas : integer, optional
+        Pas maximal de mutation des hauteurs, 5um par defaut.
 
     Returns
     -------
@@ -160,22 +1101,68 @@ def mutation(individu, points):
         Individu apres la mutation.
 
     """
-    probabilite = 0.4  # Probabilite de mutation d'un gene
-    individu.mutation(probabilite)
-    individu.set_score(points)
+    individu.mutation(probabilite, rng, pas)
+    if points is not None:
+        individu.set_score(points)
     return individu
 
 
-def genetique(points, n=None):
+def genetique(points, n=None, vectorise=False, pool=None, genomes=None,
+              mode='processus', nombre_processus=None, graine=None,
+              arret=None, sauvegarde=None, etat=None, adaptation=None,
+              recherche_locale=None, criblage=None):
     """
     Realise l'algorithme génétique d'optimisation.
 
+    Le score, la loi et les hauteurs du meilleur individu sont ensuite
+    traces dans images/ ; evoluer realise l'optimisation seule.
+
     Parameters
     ----------
     points : list of pairs of floats
         Liste des points (force, aire de contact) du cahier des charges.
     n : integer
         Numero du test de l'algorithme.
+    vectorise : boolean, optional
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    pool : Executeur, optional
+        Executeur cree par creer_pool pour les memes points, par exemple
+        pour enchainer plusieurs executions. Sans executeur, un seul est cree
+        pour toute l'execution, selon mode.
+    genomes : GenomesPartages, optional
+        Bloc de memoire partagee des parents, d'au moins 50 individus. Sans
+        bloc, un seul bloc est cree pour toute l'execution.
+    mode : str, optional
+        Executeur cree sans pool : 'serie', 'threads', 'processus', ou
+        'auto' pour choisir le plus rapide sur une generation d'essai.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+    graine : integer or np.random.SeedSequence, optional
+        Graine maitresse : a graine egale, le resultat est identique bit a
+        bit quels que soient le mode et le nombre de processus. Aleatoire
+        par defaut.
+    arret : CriteresArret, optional
+        Regles d'arret, 2000 generations par defaut. Apres l'execution,
+        arret.critere donne la regle qui a arrete l'algorithme.
+    sauvegarde : Sauvegarde, optional
+        Points de reprise periodiques, et a la fin de l'execution.
+    etat : dict, optional
+        Point de reprise lu par Sauvegarde.lire, a partir duquel continuer :
+        voir reprendre.
+    adaptation : MutationAdaptative, optional
+        Reglage de la mutation, fixe par defaut. Apres l'execution,
+        adaptation.historique donne la probabilite et le pas de chaque
+        generation.
+    recherche_locale : RechercheLocale, optional
+        Raffinement periodique des meilleurs individus par des
+        deplacements de hauteurs guides par les derivees du score. Ses
+        evaluations comptent pour les regles d'arret, et son meilleur
+        individu raffine est le resultat s'il bat celui de la population.
+    criblage : fidelite.Criblage, optional
+        Evaluation grossiere des enfants, seuls ceux qui peuvent survivre
+        etant notes finement, pour la methode de score 'courbe'. La
+        selection reste la meme tant que l'erreur du score grossier reste
+        sous sa marge.
 
     Returns
     -------
@@ -183,10 +1170,94 @@ def genetique(points, n=None):
         Valeur des hauteurs des asperites.
 
     """
-    liste_score = []
+    meilleur_individu, liste_score = evoluer(
+        points, n, vectorise, pool, genomes, mode, nombre_processus, graine,
+        arret, sauvegarde, etat, adaptation, recherche_locale, criblage)
+    i = len(liste_score) - 1  # Numero de la derniere generation
+    forces, aires = algo_direct.loi_totale(
+                    meilleur_individu.get_rayons_courbure(),
+                    meilleur_individu.get_hauteurs())
+    affichage.score(liste_score, n)
+    affichage.superposer_loi_points(forces, aires, points, i, liste_score[i],
+                                    n)
+    affichage.hauteur(meilleur_individu.get_hauteurs(), n)
+    return meilleur_individu.get_hauteurs()
+
+
+def evoluer(points, n=None, vectorise=False, pool=None, genomes=None,
+            mode='processus', nombre_processus=None, graine=None,
+            arret=None, sauvegarde=None, etat=None, adaptation=None,
+            recherche_locale=None, criblage=None):
+    """
+    Fait evoluer la population jusqu'a l'arret, sans rien afficher.
+
+    Parameters
+    ----------
+    Memes parametres que genetique.
 
+    Returns
+    -------
+    meilleur_individu : Individu
+        Meilleur individu de la derniere generation.
+    liste_score : list of floats
+        Meilleur score de chaque generation.
+
+    """
+    # Tables des courbes calculees une fois pour toute l'execution, avant
+    # la creation des processus de calcul qui les recoivent
+    algo_direct.cache_courbes.prechauffer([1], [120])
     taille_population = 50  # Taille de la population
-    population = creer_population(taille_population, points)
+    if pool is None:
+        if mode == 'auto':
+            mode, _ = choisir_mode(points, taille_population, vectorise,
+                                   nombre_processus)
+        with creer_pool(points, nombre_processus, mode) as pool:
+            return evoluer(points, n, vectorise, pool, genomes,
+                           graine=graine, arret=arret,
+                           sauvegarde=sauvegarde, etat=etat,
+                           adaptation=adaptation,
+                           recherche_locale=recherche_locale,
+                           criblage=criblage)
+    if genomes is None and not vectorise:
+        with GenomesPartages(taille_population,
+                             Individu.nombre_asperites) as genomes:
+            return evoluer(points, n, vectorise, pool, genomes,
+                           graine=graine, arret=arret,
+                           sauvegarde=sauvegarde, etat=etat,
+                           adaptation=adaptation,
+                           recherche_locale=recherche_locale,
+                           criblage=criblage)
+    if arret is None:
+        arret = CriteresArret()
+    if adaptation is None:
+        adaptation = MutationAdaptative()
+    # Les doublons de genomes ne sont evalues qu'une fois
+    cache = CacheScores()
+    if etat is not None:
+        arret.demarrer(int(etat['evaluations']), float(etat['duree']))
+        graine_generations = np.random.SeedSequence(
+            int(str(etat['graine_entropie'])),
+            spawn_key=tuple(etat['graine_cle'].tolist()),
+            pool_size=int(etat['graine_taille']),
+            n_children_spawned=int(etat['graine_enfants']))
+        liste_score = etat['liste_score'].tolist()
+        population = Population(etat['hauteurs'].copy(),
+                                etat['rayons'].copy(),
+                                etat['scores'].copy(),
+                                taux=etat['taux'].copy())
+    else:
+        arret.demarrer()
+        if not isinstance(graine, np.random.SeedSequence):
+            graine = np.random.SeedSequence(graine)
+        # Une graine pour la population initiale puis une par generation
+        graine_population, graine_generations = graine.spawn(2)
+        liste_score = []
+        population = creer_population(taille_population, points, cache,
+                                      vectorise, pool, graine_population)
+        population.taux[:] = adaptation.probabilite
+        arret.ajouter_evaluations(len(population))
+    if sauvegarde is not None:
+        sauvegarde.demarrer()
     # for individu in population:
 
     #     forces, aires = algo_direct.loi_totale(
@@ -201,12 +1272,32 @@ def genetique(points, n=None):
     i = 0  # Numero de la generation
     # while i <= 20 or not liste_score[-20] == liste_score[-1]:
     # while len(liste_score) == 0 or liste_score[-1] > 10**(-8):
-    for i in range(2000):
-        population = nouvelle_generation(population, points)
+    while True:
+        taille_parents = round(len(population)/2)  # Gardes par la selection
+        population = nouvelle_generation(population, points, cache,
+                                         vectorise, pool, genomes,
+                                         graine_generations.spawn(1)[0],
+                                         adaptation, criblage)
+        arret.ajouter_evaluations(len(population) - taille_parents)
+        if (recherche_locale is not None
+                and recherche_locale.a_appliquer(len(liste_score) + 1)):
+            arret.ajouter_evaluations(recherche_locale.appliquer(population,
+                                                                 points))
         meilleur_individu = selection(population)[0]
+        if recherche_locale is not None:
+            meilleur_individu = recherche_locale.meilleur(meilleur_individu)
         # print("Génération : ", i)
         # print(meilleur_individu.get_score())
         liste_score.append(meilleur_individu.get_score())
+        i = len(liste_score) - 1
+        fin = arret.verifier(liste_score) is not None
+        if sauvegarde is not None and (fin or sauvegarde.a_ecrire(i + 1)):
+            sauvegarde.ecrire(etat_execution(
+                points, n, vectorise, population, liste_score,
+                graine_generations, arret, sauvegarde, adaptation,
+                recherche_locale, criblage))
+        if fin:
+            break
         # if i % 100 == 0:
             # forces, aires = algo_direct.loi_totale(
                            # meilleur_individu.get_rayons_courbure(),
@@ -219,38 +1310,356 @@ def genetique(points, n=None):
     # print(meilleur_individu.set_score(points, False))  # Score sans les poids
     # print(meilleur_individu.get_score())
     # print(meilleur_individu.get_rayons_courbure())
-    forces, aires = algo_direct.loi_totale(
-                    meilleur_individu.get_rayons_courbure(),
-                    meilleur_individu.get_hauteurs())
-    affichage.score(liste_score, n)
-    affichage.superposer_loi_points(forces, aires, points, i, liste_score[i],
-                                    n)
-    affichage.hauteur(meilleur_individu.get_hauteurs(), n)
-    return meilleur_individu.get_hauteurs()
+    return meilleur_individu, liste_score
+
+
+def etat_execution(points, n, vectorise, population, liste_score,
+                   graine_generations, arret, sauvegarde, adaptation,
+                   recherche_locale=None, criblage=None):
+    """
+    Rassemble l'etat d'une execution de genetique pour un point de reprise.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    n : integer
+        Numero du test de l'algorithme.
+    vectorise : boolean
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    population : Population
+        Population de la derniere generation.
+    liste_score : list of floats
+        Meilleur score de chaque generation.
+    graine_generations : np.random.SeedSequence
+        Graine des generations, dont les generations deja calculees ont
+        recu leur graine.
+    arret : CriteresArret
+        Regles d'arret de l'execution.
+    sauvegarde : Sauvegarde
+        Points de reprise de l'execution.
+    adaptation : MutationAdaptative
+        Reglage de la mutation de l'execution.
+    recherche_locale : RechercheLocale, optional
+        Recherche locale de l'execution, avec son meilleur individu raffine.
+    criblage : fidelite.Criblage, optional
+        Criblage de l'execution, avec sa marge et ses compteurs.
+
+    Returns
+    -------
+    dict
+        Tableaux a sauvegarder, par nom.
+
+    """
+    configuration = {'points': [list(point) for point in points], 'n': n,
+                     'vectorise': vectorise,
+                     'individu': configuration_individu(),
+                     'arret': arret.parametres(),
+                     'periode_generations': sauvegarde.periode_generations,
+                     'periode_secondes': sauvegarde.periode_secondes,
+                     'adaptation': adaptation.parametres(),
+                     'sans_amelioration': adaptation.sans_amelioration,
+                     'meilleur': float(adaptation.meilleur),
+                     'recherche_locale': None, 'criblage': None}
+    etat = {}
+    if recherche_locale is not None:
+        configuration['recherche_locale'] = {
+            'parametres': recherche_locale.parametres(),
+            'evaluations': recherche_locale.evaluations,
+            'score': float(recherche_locale.score)}
+        if recherche_locale.hauteurs is not None:
+            etat['raffine_hauteurs'] = recherche_locale.hauteurs
+            etat['raffine_rayons'] = recherche_locale.rayons
+    if criblage is not None:
+        configuration['criblage'] = {
+            'parametres': criblage.parametres(),
+            'erreur_max': criblage.erreur_max,
+            'evaluations_fines': criblage.evaluations_fines,
+            'evaluations_grossieres': criblage.evaluations_grossieres}
+        etat['historique_criblage'] = np.array(criblage.historique,
+                                               dtype=float).reshape(-1, 4)
+    return {**etat,
+            'hauteurs': population.hauteurs, 'rayons': population.rayons,
+            'scores': population.scores, 'taux': population.taux,
+            'liste_score': np.array(liste_score, dtype=float),
+            'historique_mutation': np.array(adaptation.historique,
+                                            dtype=float).reshape(-1, 2),
+            # L'entropie peut depasser 64 bits
+            'graine_entropie': np.array(str(graine_generations.entropy)),
+            'graine_cle': np.array(graine_generations.spawn_key,
+                                   dtype=np.int64),
+            'graine_taille': np.array(graine_generations.pool_size),
+            'graine_enfants': np.array(
+                graine_generations.n_children_spawned),
+            'evaluations': np.array(arret.evaluations),
+            'duree': np.array(arret.duree()),
+            'configuration': np.array(json.dumps(configuration))}
+
+
+def reprendre(fichier, pool=None, mode='processus', nombre_processus=None,
+              arret=None):
+    """
+    Reprend une execution de genetique a partir de son point de reprise.
+
+    La configuration des Individus de l'execution est restauree, ainsi que
+    sa recherche locale et son criblage, et la suite de l'execution est la
+    meme que sans interruption : les generations suivantes recoivent les
+    memes graines.
+
+    Parameters
+    ----------
+    fichier : str
+        Fichier .npz ecrit par la Sauvegarde de l'execution, qui continue
+        a etre mis a jour avec les memes periodes.
+    pool : Executeur, optional
+        Executeur cree par creer_pool pour les memes points.
+    mode : str, optional
+        Executeur cree sans pool, voir genetique.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+    arret : CriteresArret, optional
+        Nouvelles regles d'arret, celles de l'execution par defaut.
+
+    Returns
+    -------
+    np.array of floats
+        Valeur des hauteurs des asperites.
+
+    """
+    etat = Sauvegarde.lire(fichier)
+    configuration = json.loads(str(etat['configuration']))
+    for nom, valeur in configuration['individu'].items():
+        setattr(Individu, nom, valeur)
+    if arret is None:
+        arret = CriteresArret(**configuration['arret'])
+    sauvegarde = Sauvegarde(fichier, configuration['periode_generations'],
+                            configuration['periode_secondes'])
+    adaptation = MutationAdaptative(**configuration['adaptation'])
+    adaptation.sans_amelioration = configuration['sans_amelioration']
+    adaptation.meilleur = configuration['meilleur']
+    adaptation.historique = [(probabilite, int(pas)) for probabilite, pas
+                             in etat['historique_mutation'].tolist()]
+    recherche_locale = None
+    if configuration.get('recherche_locale') is not None:
+        reglage = configuration['recherche_locale']
+        recherche_locale = RechercheLocale(**reglage['parametres'])
+        recherche_locale.evaluations = reglage['evaluations']
+        recherche_locale.score = reglage['score']
+        if 'raffine_hauteurs' in etat:
+            recherche_locale.hauteurs = etat['raffine_hauteurs'].copy()
+            recherche_locale.rayons = etat['raffine_rayons'].copy()
+    criblage = None
+    if configuration.get('criblage') is not None:
+        reglage = configuration['criblage']
+        criblage = fidelite.Criblage(**reglage['parametres'])
+        criblage.erreur_max = reglage['erreur_max']
+        criblage.evaluations_fines = reglage['evaluations_fines']
+        criblage.evaluations_grossieres = reglage['evaluations_grossieres']
+        criblage.historique = [
+            (int(enfants), int(compares), correlation, erreur)
+            for enfants, compares, correlation, erreur
+            in etat['historique_criblage'].tolist()]
+    points = [tuple(point) for point in configuration['points']]
+    return genetique(points, configuration['n'], configuration['vectorise'],
+                     pool, mode=mode, nombre_processus=nombre_processus,
+                     arret=arret, sauvegarde=sauvegarde, etat=etat,
+                     adaptation=adaptation, recherche_locale=recherche_locale,
+                     criblage=criblage)
+
+
+def moments_hauteurs(hauteurs):
+    """
+    Calcule les moments de la distribution des hauteurs d'une surface.
+
+    Parameters
+    ----------
+    hauteurs : np.array of integers
+        Hauteurs des asperites.
+
+    Returns
+    -------
+    dict
+        Moyenne, variance, et moments centres d'ordre 3 et 4.
+
+    """
+    moyenne = np.mean(hauteurs)
+    return {'moyenne': moyenne,
+            'variance': np.var(hauteurs),
+            'asymétrie': np.mean((hauteurs - moyenne)**3),
+            'kurtosis': np.mean((hauteurs - moyenne)**4)}
+
+
+def ajouter_resultat(fichier_csv, fichier_npz, ligne, hauteurs):
+    """
+    Ajoute le resultat d'une replique aux fichiers de sauvegarde.
+
+    Chaque ajout ouvre puis ferme les fichiers : les resultats deja ecrits
+    sont conserves si l'execution s'arrete. Le genome est ecrit avant la
+    ligne du CSV, qui marque la replique comme terminee ; un genome deja
+    present dans l'archive n'est pas ecrit une seconde fois.
+
+    Parameters
+    ----------
+    fichier_csv : str
+        Fichier CSV des moments, cree avec son en-tete si besoin.
+    fichier_npz : str
+        Archive NumPy des genomes, dont chaque replique est un tableau
+        'genome<numero>', ou None pour ne pas sauvegarder les genomes.
+    ligne : dict
+        Numero, regle d'arret et moments de la replique.
+    hauteurs : np.array of integers
+        Hauteurs du meilleur individu de la replique.
+
+    Returns
+    -------
+    None.
+
+    """
+    if fichier_npz is not None:
+        nom = 'genome' + str(ligne['numéro']) + '.npy'
+        with zipfile.ZipFile(fichier_npz, 'a') as archive:
+            if nom not in archive.namelist():
+                with archive.open(nom, 'w') as fichier:
+                    np.lib.format.write_array(fichier, np.asarray(hauteurs))
+    nouveau = not os.path.exists(fichier_csv) or not os.path.getsize(
+        fichier_csv)
+    with open(fichier_csv, 'a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(ligne.keys()))
+        if nouveau:
+            writer.writeheader()
+        writer.writerow(ligne)
+
+
+def repliques_terminees(fichier_csv):
+    """
+    Donne les numeros des repliques deja sauvegardees dans un fichier CSV.
+
+    Parameters
+    ----------
+    fichier_csv : str
+        Fichier CSV des moments, ecrit par ajouter_resultat.
+
+    Returns
+    -------
+    set of integers
+        Numeros des repliques terminees, vide sans fichier.
+
+    """
+    if not os.path.exists(fichier_csv):
+        return set()
+    with open(fichier_csv, newline='') as csvfile:
+        return {int(ligne['numéro']) for ligne in csv.DictReader(csvfile)}
+
+
+def _replique(points, n, graine, vectorise, mode, nombre_processus):
+    """
+    Realise une replique de l'algorithme dans un processus de repliques.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    n : integer
+        Numero de la replique.
+    graine : np.random.SeedSequence
+        Graine de la replique.
+    vectorise : boolean
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    mode : str
+        Executeur de la replique, voir creer_pool.
+    nombre_processus : integer
+        Nombre de processus ou de threads de la replique.
+
+    Returns
+    -------
+    n : integer
+        Numero de la replique.
+    critere : str
+        Regle qui a arrete la replique.
+    hauteurs : np.array of integers
+        Hauteurs du meilleur individu.
+
+    """
+    arret = CriteresArret()
+    hauteurs = genetique(points, n, vectorise, mode=mode,
+                         nombre_processus=nombre_processus, graine=graine,
+                         arret=arret)
+    return n, arret.critere, hauteurs
+
+
+def repliques(points, nombre_repliques, fichier_csv='save.csv',
+              fichier_npz='genomes.npz', repliques_paralleles=None,
+              vectorise=False, graine=None, continuer=False):
+    """
+    Realise plusieurs repliques independantes de l'algorithme a la fois.
+
+    Les coeurs sont partages entre les repliques simultanees, puis entre
+    les processus de chaque replique. Chaque replique est sauvegardee des
+    qu'elle se termine, sans garder les resultats en memoire. Apres un
+    arret, continuer=True ne relance que les repliques absentes du CSV,
+    avec les memes numeros et les memes graines.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    nombre_repliques : integer
+        Nombre de repliques.
+    fichier_csv : str, optional
+        Fichier CSV des moments des hauteurs, complete au fur et a mesure.
+    fichier_npz : str, optional
+        Archive NumPy des genomes, completee au fur et a mesure, ou None.
+    repliques_paralleles : integer, optional
+        Nombre de repliques simultanees, autant que de coeurs par defaut.
+    vectorise : boolean, optional
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    graine : integer or np.random.SeedSequence, optional
+        Graine maitresse, dont chaque replique recoit une suite propre.
+    continuer : boolean, optional
+        Complete les fichiers d'une execution interrompue, avec la meme
+        graine. Sinon, les fichiers existants sont remplaces.
+
+    Returns
+    -------
+    None.
+
+    """
+    if continuer:
+        terminees = repliques_terminees(fichier_csv)
+    else:
+        terminees = set()
+        for fichier in (fichier_csv, fichier_npz):
+            if fichier is not None and os.path.exists(fichier):
+                os.remove(fichier)
+    if not isinstance(graine, np.random.SeedSequence):
+        graine = np.random.SeedSequence(graine)
+    # Toutes les graines sont tirees, pour que chaque numero garde la sienne
+    graines = graine.spawn(nombre_repliques)
+    restantes = [n for n in range(nombre_repliques) if n not in terminees]
+    if not restantes:
+        return
+    if repliques_paralleles is None:
+        repliques_paralleles = min(len(restantes), nombre_coeurs)
+    repliques_paralleles = max(repliques_paralleles, 1)
+    # Coeurs restants pour chaque replique
+    nombre_processus = max(nombre_coeurs // repliques_paralleles, 1)
+    mode = 'processus' if nombre_processus > 1 else 'serie'
+    with ProcessPoolExecutor(repliques_paralleles) as executeur:
+        taches = [executeur.submit(_replique, points, n, graines[n],
+                                   vectorise, mode, nombre_processus)
+                  for n in restantes]
+        for tache in as_completed(taches):
+            n, critere, hauteurs = tache.result()
+            ligne = {'numéro': n, 'arrêt': critere}
+            ligne.update(moments_hauteurs(hauteurs))
+            ajouter_resultat(fichier_csv, fichier_npz, ligne, hauteurs)
 
 
 if __name__ == "__main__":
     # debut = time.time()
-    liste = []
-    for n in range(1):
-        hauteurs = genetique([(18384800256 * (90*i+1),
-                               18384800256 * (90*i+1) * 3.1069013782046355e-06)
-                              for i in range(10)],
-                             n)
-        moyenne = np.mean(hauteurs)
-        moments = {'numéro': n,
-                   'moyenne': np.mean(hauteurs),
-                   'variance': np.var(hauteurs),
-                   'asymétrie': np.mean((hauteurs - moyenne)**3),
-                   'kurtosis': np.mean((hauteurs - moyenne)**4)}
-        liste.append(moments)
-
-    with open('save.csv', 'w', newline='') as csvfile:
-        fieldnames = list(moments.keys())
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for moments in liste:
-            writer.writerow(moments)
+    repliques([(18384800256 * (90*i+1),
+                18384800256 * (90*i+1) * 3.1069013782046355e-06)
+               for i in range(10)],
+              1)
 
     # print(time.time() - debut)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+
+"""Algorithme genetique en iles reparties sur plusieurs processus."""
+
+import multiprocessing
+import numpy as np
+from individu import Individu
+from population import GenomesPartages
+import algo_direct
+import genetique
+
+
+def _ile(points, cache, configuration, taille_population, vectorise, graine,
+         connexion):
+    """
+    Fait evoluer une ile dans son processus, jusqu'a l'ordre d'arret.
+
+    A chaque epoque, l'ile recoit le nombre de generations a calculer et
+    ses immigrants, puis renvoie ses meilleurs scores par generation, son
+    nombre d'evaluations et ses meilleurs individus.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : algo_direct.CacheCourbes
+        Cache des tables de courbes deja rempli.
+    configuration : dict
+        Attributs de classe d'Individu.
+    taille_population : integer
+        Taille de la population de l'ile.
+    vectorise : boolean
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    graine : np.random.SeedSequence
+        Graine de l'ile.
+    connexion : multiprocessing.connection.Connection
+        Extremite du tube vers le processus principal.
+
+    Returns
+    -------
+    None.
+
+    """
+    genetique._initialiser_processus(points, cache, configuration)
+    graine_population, graine_generations = graine.spawn(2)
+    genomes = None
+    if not vectorise:
+        genomes = GenomesPartages(taille_population,
+                                  Individu.nombre_asperites)
+    try:
+        with genetique.creer_pool(points, mode='serie') as pool:
+            cache_scores = genetique.CacheScores()
+            population = genetique.creer_population(
+                taille_population, points, cache_scores, vectorise, pool,
+                graine_population)
+            evaluations = len(population)
+            message = connexion.recv()
+            while message is not None:
+                nombre_generations, nombre_migrants, immigrants = message
+                if immigrants is not None:
+                    population.remplacer_pires(immigrants)
+                scores = []
+                for _ in range(nombre_generations):
+                    taille_parents = round(len(population)/2)
+                    population = genetique.nouvelle_generation(
+                        population, points, cache_scores, vectorise, pool,
+                        genomes, graine_generations.spawn(1)[0])
+                    evaluations += len(population) - taille_parents
+                    scores.append(np.min(population.scores))
+                # Toujours au moins le meilleur individu, pour le resultat
+                connexion.send((scores, evaluations,
+                                population.meilleurs(max(nombre_migrants,
+                                                         1))))
+                message = connexion.recv()
+    finally:
+        if genomes is not None:
+            genomes.fermer()
+        connexion.close()
+
+
+def voisins(numero, nombre_iles, topologie='anneau'):
+    """
+    Donne les iles qui envoient leurs migrants a une ile.
+
+    Parameters
+    ----------
+    numero : integer
+        Numero de l'ile qui recoit.
+    nombre_iles : integer
+        Nombre total d'iles.
+    topologie : str, optional
+        'anneau' (l'ile precedente) ou 'complete' (toutes les autres).
+
+    Returns
+    -------
+    list of integers
+        Numeros des iles emettrices.
+
+    """
+    if topologie == 'anneau':
+        return [(numero - 1) % nombre_iles] if nombre_iles > 1 else []
+    if topologie == 'complete':
+        return [autre for autre in range(nombre_iles) if autre != numero]
+    raise ValueError("Topologie inconnue : " + str(topologie))
+
+
+def genetique_iles(points, nombre_iles=None, intervalle=10,
+                   nombre_migrants=2, topologie='anneau', vectorise=True,
+                   graine=None, arret=None, taille_population=50):
+    """
+    Realise l'algorithme genetique en iles.
+
+    Chaque ile est une population qui evolue seule dans son processus ;
+    toutes les intervalle generations, les iles echangent leurs meilleurs
+    individus, qui remplacent les moins bons de l'ile qui les recoit. C'est
+    la seule synchronisation entre les processus.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    nombre_iles : integer, optional
+        Nombre d'iles, le nombre de coeurs par defaut.
+    intervalle : integer, optional
+        Nombre de generations entre deux migrations.
+    nombre_migrants : integer, optional
+        Nombre de meilleurs individus envoyes par chaque ile.
+    topologie : str, optional
+        'anneau' ou 'complete', voir voisins.
+    vectorise : boolean, optional
+        Operateurs genetiques appliques d'un coup a toute la Population.
+    graine : integer or np.random.SeedSequence, optional
+        Graine maitresse, dont chaque ile recoit une suite propre.
+    arret : genetique.CriteresArret, optional
+        Regles d'arret appliquees au meilleur score de toutes les iles et au
+        total des evaluations, verifiees a chaque migration. 2000
+        generations par defaut.
+    taille_population : integer, optional
+        Taille de la population de chaque ile.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs des asperites du meilleur individu de toutes les iles.
+    liste_score : list of floats
+        Meilleur score de toutes les iles a chaque generation.
+    scores_iles : np.array of floats
+        Tableau (nombre_iles, generations) du meilleur score de chaque ile.
+
+    """
+    if nombre_iles is None:
+        nombre_iles = genetique.nombre_coeurs
+    if arret is None:
+        arret = genetique.CriteresArret()
+    if not isinstance(graine, np.random.SeedSequence):
+        graine = np.random.SeedSequence(graine)
+    voisins(0, nombre_iles, topologie)  # Verifie la topologie
+    algo_direct.cache_courbes.prechauffer([1], [120])
+    connexions = []
+    processus = []
+    for graine_ile in graine.spawn(nombre_iles):
+        connexion, connexion_ile = multiprocessing.Pipe()
+        processus.append(multiprocessing.Process(
+            target=_ile, daemon=True,
+            args=(points, algo_direct.cache_courbes,
+                  genetique.configuration_individu(), taille_population,
+                  vectorise, graine_ile, connexion_ile)))
+        processus[-1].start()
+        connexion_ile.close()
+        connexions.append(connexion)
+    arret.demarrer()
+    liste_score = []
+    scores_iles = [[] for _ in range(nombre_iles)]
+    immigrants = [None] * nombre_iles
+    try:
+        while True:
+            nombre_generations = intervalle
+            if arret.generations_max is not None:
+                nombre_generations = min(
+                    intervalle, arret.generations_max - len(liste_score))
+            for connexion, arrivants in zip(connexions, immigrants):
+                connexion.send((nombre_generations, nombre_migrants,
+                                arrivants))
+            resultats = [connexion.recv() for connexion in connexions]
+            for scores_ile, (scores, _, _) in zip(scores_iles, resultats):
+                scores_ile.extend(scores)
+            liste_score.extend(np.min([scores for scores, _, _ in resultats],
+                                      axis=0).tolist())
+            arret.ajouter_evaluations(
+                sum(evaluations for _, evaluations, _ in resultats)
+                - arret.evaluations)
+            migrants = [meilleurs for _, _, meilleurs in resultats]
+            if arret.verifier(liste_score) is not None:
+                break
+            immigrants = []
+            for numero in range(nombre_iles):
+                arrivants = None
+                for autre in voisins(numero, nombre_iles, topologie):
+                    if nombre_migrants == 0:
+                        break
+                    arrivants = (migrants[autre] if arrivants is None
+                                 else arrivants.concatener(migrants[autre]))
+                immigrants.append(arrivants)
+    finally:
+        for connexion, un_processus in zip(connexions, processus):
+            if un_processus.is_alive():
+                connexion.send(None)
+            connexion.close()
+        for un_processus in processus:
+            un_processus.join()
+    meilleure_ile = int(np.argmin([meilleurs.scores[0]
+                                   for meilleurs in migrants]))
+    return (migrants[meilleure_ile].hauteurs[0], liste_score,
+            np.array(scores_iles))
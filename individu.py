@@ -3,10 +3,101 @@
 
 """Classe individu qui represente une possibilite de surface."""
 
-import random
 import numpy as np
 import algo_direct
 
+TYPE_HAUTEURS = np.uint8  # Hauteurs entieres entre 0um et 120um
+TYPE_RAYONS = np.uint16  # Rayons entiers entre 100um et 530um
+PROBABILITE_MUTATION = 0.4  # Probabilite de mutation d'un gene
+PAS_MUTATION = 5  # Pas maximal de mutation d'une hauteur, en um
+
+
+def fusion_genes(genes_peres, genes_meres, rng):
+    """
+    Fusionne les genes de parents pour avoir ceux des enfants.
+
+    Les tableaux peuvent contenir un seul genome ou un lot de genomes (une
+    ligne par enfant) : chaque enfant tire sa probabilite de prendre les
+    genes du pere, puis tous ses tirages sont faits d'un coup.
+
+    Parameters
+    ----------
+    genes_peres : np.array
+        Genes des peres.
+    genes_meres : np.array
+        Genes des meres, de meme forme.
+    rng : np.random.Generator
+        Generateur de nombres aleatoires.
+
+    Returns
+    -------
+    np.array
+        Genes des enfants.
+
+    """
+    # Probabilite de prendre les genes du pere, une par enfant
+    seuils = rng.random(np.shape(genes_peres)[:-1] + (1,))
+    du_pere = rng.random(np.shape(genes_peres)) < seuils
+    return np.where(du_pere, genes_peres, genes_meres)
+
+
+def mutation_hauteurs(hauteurs, probabilite, rng, pas=PAS_MUTATION):
+    """
+    Realise la mutation d'un ou plusieurs genomes de hauteurs.
+
+    Chaque gene mute avec la probabilite donnee d'un pas entier d'au plus
+    +-pas um, sans sortir de [0um, 120um].
+
+    Parameters
+    ----------
+    hauteurs : np.array of integers
+        Hauteurs a muter.
+    probabilite : float or np.array of floats
+        Probabilite pour un gene de muter, ou une par genome (colonne).
+    rng : np.random.Generator
+        Generateur de nombres aleatoires.
+    pas : integer, optional
+        Pas maximal de mutation, 5um par defaut.
+
+    Returns
+    -------
+    np.array of integers
+        Hauteurs apres mutation, du meme type que hauteurs.
+
+    """
+    hauteurs_entieres = np.asarray(hauteurs).astype(np.int64)
+    mutes = rng.random(hauteurs_entieres.shape) < probabilite
+    bas = -np.minimum(hauteurs_entieres, pas)  # Si proche de 0um
+    haut = np.minimum(120 - hauteurs_entieres, pas)  # Si proche de 120um
+    deltas = rng.integers(bas, haut + 1)
+    return (hauteurs_entieres
+            + np.where(mutes, deltas, 0)).astype(np.asarray(hauteurs).dtype)
+
+
+def mutation_rayons(rayons, probabilite, rng):
+    """
+    Realise la mutation d'un ou plusieurs genomes de rayons.
+
+    Parameters
+    ----------
+    rayons : np.array of integers
+        Rayons a muter.
+    probabilite : float
+        Probabilite pour un gene de muter.
+    rng : np.random.Generator
+        Generateur de nombres aleatoires.
+
+    Returns
+    -------
+    np.array of integers
+        Rayons apres mutation, entre 100um et 530um par pas de 10um.
+
+    """
+    mutes = rng.random(np.shape(rayons)) < probabilite
+    nouveaux_rayons = 10 * rng.integers(10, 54, np.shape(rayons))
+    return np.where(mutes, nouveaux_rayons, rayons).astype(
+        np.asarray(rayons).dtype)
+
 
 class Individu:
     """
@@ -20,10 +111,21 @@ class Individu:
         Nombre d'asperites de l'ensemble des individus.
     changement_rayons : boolean
         Presence ou non des rayons comme genes pour nos individus.
-    hauteurs : np.array of floats
-        Hauteurs de chaque asperite.
-    rayons : np.array of floats
-        Rayons de courbure de chaque asperite.
+    methode_score : str
+        Calcul du score sur la courbe complete ('courbe'), en resolvant
+        directement en chaque point du cahier des charges ('points') ou sur
+        une grille resserree autour des points ('adaptative').
+    interpolation : boolean
+        Interpolation lineaire des courbes lors du calcul du score.
+    precision : float
+        Precision sur l'indentation (um) pour la methode 'points'.
+    tolerance : float
+        Erreur relative d'interpolation pres des points pour la methode
+        'adaptative'.
+    hauteurs : np.array of integers
+        Hauteurs de chaque asperite, stockees sur un octet (TYPE_HAUTEURS).
+    rayons : np.array of integers
+        Rayons de courbure de chaque asperite, sur deux octets (TYPE_RAYONS).
     score : float
         Score de notre individu.
 
@@ -41,31 +143,37 @@ class Individu:
         Obtient le rayon d'une asperite.
     set_rayon(i: int, valeur: float)
         Definit le rayon d'une asperite.
-    set_score(points: list of couple of floats, poids: boolean)
+    set_score(points: list of couple of floats, poids: boolean,
+              score: float)
         Definit le score de l'individu.
     get_score() -> float
         Obtient le score d'un individu.
-    mutation(probabilite: float)
+    mutation(probabilite: float, rng: np.random.Generator, pas: int)
         Realise la mutation de l'individu.
 
     Private methods
     -------
-    __hauteurs_aleatoires() -> np.array of floats
+    __hauteurs_aleatoires(rng: np.random.Generator) -> np.array of floats
         Cree aleatoirement les hauteurs de l'Individu.
-    __hauteurs_fusion(individu1: Individu, individu2: Individu)
-                      -> np of array of floats
+    __hauteurs_fusion(individu1: Individu, individu2: Individu,
+                      rng: np.random.Generator) -> np of array of floats
         Fusionne les hauteurs des Individus parents pour avoir celles enfants.
-    __rayons_aleatoires() -> np.array of floats
+    __rayons_aleatoires(rng: np.random.Generator) -> np.array of floats
         Cree aleatoirement les rayons de l'Individu.
-    __rayons_fusion(individu1: Individu, individu2: Individu)
-                      -> np of array of floats
+    __rayons_fusion(individu1: Individu, individu2: Individu,
+                    rng: np.random.Generator) -> np of array of floats
         Fusionne les rayons des Individus parents pour avoir celles enfants.
     """
 
     nombre_asperites = 1000
     changement_rayons = False
+    methode_score = 'courbe'
+    interpolation = False
+    precision = 1e-6
+    tolerance = 1e-6
 
-    def __init__(self, individu1=None, individu2=None):
+    def __init__(self, individu1=None, individu2=None, hauteurs=None,
+                 rayons=None, rng=None):
         """
         Initialise une instance de Individu.
 
@@ -75,32 +183,54 @@ class Individu:
             Individu père s'il s'agit d'un Individu enfant, sinon None.
         Individu2 : Individu
             Individu mère s'il s'agit d'un Individu enfant, sinon None.
+        hauteurs : np.array of floats, optional
+            Hauteurs utilisees telles quelles, sans copie (par exemple une
+            ligne d'une Population).
+        rayons : np.array of floats, optional
+            Rayons utilises tels quels avec hauteurs, 526 um par defaut.
+        rng : np.random.Generator, optional
+            Generateur de nombres aleatoires, un nouveau par defaut.
 
         Returns
         -------
         None.
 
         """
-        if self.changement_rayons:
+        if rng is None and hauteurs is None:
+            rng = np.random.default_rng()
+        if hauteurs is not None:
+            self.__hauteurs = hauteurs
+            if rayons is None:
+                rayons = np.full(len(hauteurs), 526, dtype=TYPE_RAYONS)
+            self.__rayons = rayons
+        elif self.changement_rayons:
             if individu1 is None:
-                self.__hauteurs = self.__hauteurs_aleatoires()
-                self.__rayons = self.__rayons_aleatoires()
+                self.__hauteurs = self.__hauteurs_aleatoires(rng)
+                self.__rayons = self.__rayons_aleatoires(rng)
             else:
-                self.__hauteurs = self.__hauteurs_fusion(individu1, individu2)
-                self.__rayons = self.__rayons_fusion(individu1, individu2)
+                self.__hauteurs = self.__hauteurs_fusion(individu1, individu2,
+                                                         rng)
+                self.__rayons = self.__rayons_fusion(individu1, individu2,
+                                                     rng)
         else:
             if individu1 is None:
-                self.__hauteurs = self.__hauteurs_aleatoires()
+                self.__hauteurs = self.__hauteurs_aleatoires(rng)
             else:
-                self.__hauteurs = self.__hauteurs_fusion(individu1, individu2)
-            self.__rayons = np.array([526 for i in range(
-                                      self.nombre_asperites)])
+                self.__hauteurs = self.__hauteurs_fusion(individu1, individu2,
+                                                         rng)
+            self.__rayons = np.full(self.nombre_asperites, 526,
+                                    dtype=TYPE_RAYONS)
         self.__score = 0
 
-    def __hauteurs_aleatoires(self):
+    def __hauteurs_aleatoires(self, rng):
         """
         Cree aleatoirement les hauteurs de l'Individu.
 
+        Parameters
+        ----------
+        rng : np.random.Generator
+            Generateur de nombres aleatoires.
+
         Returns
         -------
         hauteurs : np.array of floats
@@ -109,11 +239,11 @@ class Individu:
         """
         # On veut etre dans 0um et 120um avec une precision de 1um
         # Hauteurs en um
-        hauteurs = np.array([random.randint(0, 120) for i
-                             in range(self.nombre_asperites)])
+        hauteurs = rng.integers(0, 121, self.nombre_asperites,
+                                dtype=TYPE_HAUTEURS)
         return hauteurs
 
-    def __hauteurs_fusion(self, individu1, individu2):
+    def __hauteurs_fusion(self, individu1, individu2, rng):
         """
         Fusionne les hauteurs des Individus parents pour avoir celles enfants.
 
@@ -123,6 +253,8 @@ class Individu:
             Individu père.
         Individu2 : Individu
             Individu mère.
+        rng : np.random.Generator
+            Generateur de nombres aleatoires.
 
         Returns
         -------
@@ -130,15 +262,8 @@ class Individu:
             Ensemble des hauteurs de l'Individu enfant.
 
         """
-        # Probabilite de prendre les genes du pere.
-        seuil = random.random()
-        hauteurs = np.array([0 for i in range(self.nombre_asperites)])
-        for i in range(self.nombre_asperites):
-            test = random.random()
-            if test < seuil:  # Si on est avant la coupure
-                hauteurs[i] = individu1.get_hauteur(i)
-            else:
-                hauteurs[i] = individu2.get_hauteur(i)
+        hauteurs = fusion_genes(individu1.get_hauteurs(),
+                                individu2.get_hauteurs(), rng)
         return hauteurs
 
     def get_hauteur(self, i):
@@ -200,10 +325,15 @@ class Individu:
         """
         return self.__rayons
 
-    def __rayons_aleatoires(self):
+    def __rayons_aleatoires(self, rng):
         """
         Cree aleatoirement les rayons de l'Individu.
 
+        Parameters
+        ----------
+        rng : np.random.Generator
+            Generateur de nombres aleatoires.
+
         Returns
         -------
         rayons : np.array of floats
@@ -212,11 +342,11 @@ class Individu:
         """
         # On veut etre dans 100um et 530um avec une precision de 10um
         # rayons en um
-        rayons = np.array([10 * random.randint(10, 53) for i
-                           in range(self.nombre_asperites)])
+        rayons = 10 * rng.integers(10, 54, self.nombre_asperites,
+                                   dtype=TYPE_RAYONS)
         return rayons
 
-    def __rayons_fusion(self, individu1, individu2):
+    def __rayons_fusion(self, individu1, individu2, rng):
         """
         Fusionne les rayons des Individus parents pour avoir celles enfants.
 
@@ -226,6 +356,8 @@ class Individu:
             Individu père.
         Individu2 : Individu
             Individu mère.
+        rng : np.random.Generator
+            Generateur de nombres aleatoires.
 
         Returns
         -------
@@ -233,15 +365,8 @@ class Individu:
             Ensemble des rayons de l'Individu enfant.
 
         """
-        # Probabilite de prendre les genes du pere.
-        seuil = random.random()
-        rayons = np.array([0 for i in range(self.nombre_asperites)])
-        for i in range(self.nombre_asperites):
-            test = random.random()
-            if test < seuil:  # Si on est avant la coupure
-                rayons[i] = individu1.get_rayon(i)
-            else:
-                rayons[i] = individu2.get_rayon(i)
+        rayons = fusion_genes(individu1.get_rayons_courbure(),
+                              individu2.get_rayons_courbure(), rng)
         return rayons
 
     def get_rayon(self, i):
@@ -279,7 +404,7 @@ class Individu:
         """
         self.__rayons[i] = valeur
 
-    def set_score(self, points, poids=True):
+    def set_score(self, points, poids=True, score=None):
         """
         Definit le score de l'individu.
 
@@ -289,6 +414,8 @@ class Individu:
             Individu dont on va calculer le score.
         points : list of couple of floats
             Points (force, aire_totale) du cahier des charges
+        score : float, optional
+            Score deja calcule, par exemple par genetique.evaluer_population.
 
         Returns
         -------
@@ -296,23 +423,15 @@ class Individu:
             Score obtenu par la methode des moindres carres
 
         """
-        score = 0
-        aire_0 = points[-1][1]  # Aire pour normalisee
-        force_0 = points[-1][0]  # Force pour normalisee
-        forces, aires = algo_direct.loi_totale(self.get_rayons_courbure(),
-                                               self.get_hauteurs())
-        for i, point in enumerate(points):
-            force, aire = algo_direct.get_force_aire(forces, aires, point)
-            if i == 0 and poids:
-                score = (1 * (((point[1] - aire)/aire_0)**2
-                         + ((point[0] - force)/force_0)**2))
-            else:
-                score = (score + ((point[1] - aire)/aire_0)**2
-                         + ((point[0] - force)/force_0)**2)
-        if poids:
-            self.__score = score/len(points)
-        else:
-            self.__score = score/len(points)
+        if score is not None:
+            self.__score = score
+            return
+        forces_points, aires_points = algo_direct.evaluer_points(
+            self.get_rayons_courbure(), self.get_hauteurs(), points,
+            self.methode_score, self.interpolation, self.precision,
+            algo_direct.cache_courbes, self.tolerance)
+        self.__score = algo_direct.score_points(points, forces_points,
+                                                aires_points)
 
     def get_score(self):
         """
@@ -326,7 +445,7 @@ class Individu:
         """
         return self.__score
 
-    def mutation(self, probabilite):
+    def mutation(self, probabilite, rng=None, pas=PAS_MUTATION):
         """
         Realise la mutation de l'individu.
 
@@ -334,27 +453,24 @@ class Individu:
         ----------
         probabilite : float
             Probabilite pour un gene de muter.
+        rng : np.random.Generator, optional
+            Generateur de nombres aleatoires, un nouveau par defaut.
+        pas : integer, optional
+            Pas maximal de mutation des hauteurs, 5um par defaut.
 
         Returns
         -------
         None.
 
         """
-        for i in range(len(self.__hauteurs)):
-            if random.random() < probabilite:  # Si mutation sur la hauteur
-                if self.__hauteurs[i] < 5:  # Si on la hauteur est proche de 0
-                    delta = random.randint(- self.__hauteurs[i], 5)  # En um
-                elif self.__hauteurs[i] > 115:
-                    delta = random.randint(-5, 120 - self.__hauteurs[i])
-                else:
-                    delta = random.randint(-5, 5)  # En um
-                hauteur = self.__hauteurs[i] + delta
-                self.set_hauteur(i, hauteur)
+        if rng is None:
+            rng = np.random.default_rng()
+        # Modification sur place pour rester une vue d'une Population
+        self.__hauteurs[:] = mutation_hauteurs(self.__hauteurs, probabilite,
+                                               rng, pas)
         if self.changement_rayons:
-            for i in range(len(self.__rayons)):
-                if random.random() < probabilite:  # Si a mutation sur le rayon
-                    rayon = 10 * random.randint(10, 53)  # En um
-                    self.set_rayon(i, rayon)
+            self.__rayons[:] = mutation_rayons(self.__rayons, probabilite,
+                                               rng)
 
 
 if __name__ == "__main__":
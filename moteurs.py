@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+
+
+"""Moteurs d'optimisation interchangeables pour un meme cahier des charges."""
+
+import time
+import numpy as np
+from individu import Individu, TYPE_HAUTEURS, TYPE_RAYONS
+from population import Population
+import algo_direct
+import genetique
+
+
+def genomes_entiers(hauteurs, rayons=None):
+    """
+    Ramene des genomes continus aux genomes entiers des Individus.
+
+    Parameters
+    ----------
+    hauteurs : np.array of floats
+        Tableau (genomes, asperites) des hauteurs continues.
+    rayons : np.array of floats, optional
+        Tableau des rayons continus, 526um par defaut.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs arrondies au um, entre 0um et 120um.
+    rayons : np.array of integers
+        Rayons arrondis a 10um, entre 100um et 530um.
+
+    """
+    hauteurs = np.clip(np.rint(hauteurs), 0, 120).astype(TYPE_HAUTEURS)
+    if rayons is None:
+        return hauteurs, np.full(hauteurs.shape, 526, dtype=TYPE_RAYONS)
+    rayons = 10 * np.clip(np.rint(np.asarray(rayons) / 10), 10, 53)
+    return hauteurs, rayons.astype(TYPE_RAYONS)
+
+
+def evaluer_genomes(hauteurs, rayons, points, cache=None, pool=None):
+    """
+    Evalue un lot de genomes avec l'evaluateur de l'algorithme genetique.
+
+    Parameters
+    ----------
+    hauteurs : np.array of floats
+        Tableau (genomes, asperites) des hauteurs, continues ou entieres.
+    rayons : np.array of floats
+        Tableau des rayons, ou None pour 526um.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    cache : genetique.CacheScores, optional
+        Cache des scores de l'execution.
+    pool : Executeur, optional
+        Executeur cree par genetique.creer_pool pour les memes points.
+
+    Returns
+    -------
+    population : Population
+        Genomes entiers evalues.
+
+    """
+    population = Population(*genomes_entiers(hauteurs, rayons))
+    genetique.evaluer_population(population, points, cache, pool)
+    return population
+
+
+def _genetique(points, pool, arret, graine, vectorise=True):
+    """
+    Moteur de l'algorithme genetique a selection par troncature.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    pool : Executeur
+        Executeur cree par genetique.creer_pool.
+    arret : genetique.CriteresArret
+        Regles d'arret.
+    graine : np.random.SeedSequence
+        Graine de l'execution.
+    vectorise : boolean, optional
+        Operateurs genetiques appliques d'un coup a toute la Population.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs du meilleur individu.
+    liste_score : list of floats
+        Meilleur score de chaque generation.
+
+    """
+    meilleur_individu, _ = genetique.evoluer(points, vectorise=vectorise,
+                                             pool=pool, graine=graine,
+                                             arret=arret)
+    return meilleur_individu.get_hauteurs(), list(arret.historique)
+
+
+def _cmaes(points, pool, arret, graine, taille_population=None, sigma=10):
+    """
+    Moteur CMA-ES separable sur les hauteurs relachees en continu.
+
+    Avec 1000 asperites, la matrice de covariance complete serait trop
+    couteuse a mettre a jour : seule sa diagonale est adaptee (sep-CMA-ES,
+    Ros et Hansen 2008). Chaque candidat est arrondi pour etre evalue, la
+    mise a jour utilisant les valeurs continues. Avec changement_rayons,
+    les rayons sont des variables continues de plus.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    pool : Executeur
+        Executeur cree par genetique.creer_pool.
+    arret : genetique.CriteresArret
+        Regles d'arret, une generation par lot de candidats.
+    graine : np.random.SeedSequence
+        Graine de l'execution.
+    taille_population : integer, optional
+        Nombre de candidats par generation, 4 + 3 ln(dimension) par defaut.
+    sigma : float, optional
+        Pas initial, en um.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs du meilleur candidat.
+    liste_score : list of floats
+        Meilleur score rencontre a chaque generation.
+
+    """
+    rng = np.random.default_rng(graine)
+    nombre_asperites = Individu.nombre_asperites
+    bas = np.zeros(nombre_asperites)
+    haut = np.full(nombre_asperites, 120.)
+    if Individu.changement_rayons:
+        bas = np.concatenate((bas, np.full(nombre_asperites, 100.)))
+        haut = np.concatenate((haut, np.full(nombre_asperites, 530.)))
+    dimension = len(bas)
+    if taille_population is None:
+        taille_population = 4 + int(3 * np.log(dimension))
+    mu = taille_population // 2
+    poids = np.log((taille_population + 1) / 2) - np.log(np.arange(1, mu + 1))
+    poids /= np.sum(poids)
+    mu_eff = 1 / np.sum(poids**2)
+    c_c = 4 / (dimension + 4)
+    c_s = (mu_eff + 2) / (dimension + mu_eff + 5)
+    # Apprentissage plus rapide, la covariance etant diagonale
+    c_1 = (dimension + 2) / 3 * 2 / ((dimension + 1.3)**2 + mu_eff)
+    c_mu = min(1 - c_1, (dimension + 2) / 3 * 2 * (mu_eff - 2 + 1 / mu_eff)
+               / ((dimension + 2)**2 + mu_eff))
+    amortissement = (1 + 2 * max(0, np.sqrt((mu_eff - 1)
+                                            / (dimension + 1)) - 1) + c_s)
+    norme_attendue = np.sqrt(dimension) * (1 - 1 / (4 * dimension)
+                                           + 1 / (21 * dimension**2))
+    moyenne = rng.uniform(bas, haut)
+    variances = np.ones(dimension)
+    p_c = np.zeros(dimension)
+    p_s = np.zeros(dimension)
+    cache = genetique.CacheScores()
+    meilleur, meilleur_score = None, np.inf
+    liste_score = []
+    while True:
+        ecarts = np.sqrt(variances) * rng.standard_normal(
+            (taille_population, dimension))
+        candidats = moyenne + sigma * ecarts
+        population = evaluer_genomes(
+            candidats[:, :nombre_asperites],
+            candidats[:, nombre_asperites:] if dimension > nombre_asperites
+            else None, points, cache, pool)
+        arret.ajouter_evaluations(taille_population)
+        ordre = np.argsort(population.scores, kind='stable')
+        if population.scores[ordre[0]] < meilleur_score:
+            meilleur = population.hauteurs[ordre[0]].copy()
+            meilleur_score = population.scores[ordre[0]]
+        liste_score.append(meilleur_score)
+        if arret.verifier(liste_score) is not None:
+            return meilleur, liste_score
+        ecarts_choisis = ecarts[ordre[:mu]]
+        pas_moyen = poids @ ecarts_choisis
+        moyenne = np.clip(moyenne + sigma * pas_moyen, bas, haut)
+        p_s = ((1 - c_s) * p_s + np.sqrt(c_s * (2 - c_s) * mu_eff)
+               * pas_moyen / np.sqrt(variances))
+        norme = np.linalg.norm(p_s) / np.sqrt(
+            1 - (1 - c_s)**(2 * len(liste_score)))
+        h_sigma = norme / norme_attendue < 1.4 + 2 / (dimension + 1)
+        p_c = ((1 - c_c) * p_c
+               + h_sigma * np.sqrt(c_c * (2 - c_c) * mu_eff) * pas_moyen)
+        variances = ((1 - c_1 - c_mu) * variances
+                     + c_1 * (p_c**2 + (1 - h_sigma) * c_c * (2 - c_c)
+                              * variances)
+                     + c_mu * poids @ ecarts_choisis**2)
+        sigma *= np.exp(c_s / amortissement
+                        * (np.linalg.norm(p_s) / norme_attendue - 1))
+
+
+def histogramme_vers_hauteurs(poids, nombre_asperites):
+    """
+    Transforme des poids par hauteur en hauteurs d'asperites.
+
+    Les effectifs sont proportionnels aux poids, arrondis par la methode
+    des plus forts restes pour que leur somme soit nombre_asperites.
+
+    Parameters
+    ----------
+    poids : np.array of floats
+        Tableau (genomes, 121) des poids positifs des hauteurs 0um a 120um.
+    nombre_asperites : integer
+        Nombre d'asperites de chaque surface.
+
+    Returns
+    -------
+    np.array of integers
+        Tableau (genomes, nombre_asperites) des hauteurs, triees.
+
+    """
+    poids = np.maximum(poids, 0)
+    totaux = np.sum(poids, axis=1, keepdims=True)
+    # Sans poids, toutes les hauteurs sont equiprobables
+    poids = np.where(totaux > 0, poids, 1)
+    effectifs_reels = (poids / np.sum(poids, axis=1, keepdims=True)
+                       * nombre_asperites)
+    effectifs = np.floor(effectifs_reels).astype(np.int64)
+    manquants = nombre_asperites - np.sum(effectifs, axis=1, keepdims=True)
+    rangs = np.argsort(np.argsort(effectifs - effectifs_reels, axis=1,
+                                  kind='stable'), axis=1, kind='stable')
+    effectifs += rangs < manquants
+    return np.array([np.repeat(np.arange(poids.shape[1]), effectifs_genome)
+                     for effectifs_genome in effectifs])
+
+
+def _evolution_differentielle(points, pool, arret, graine,
+                              taille_population=50, facteur=0.5,
+                              croisement=0.9):
+    """
+    Moteur d'evolution differentielle sur l'histogramme des hauteurs.
+
+    La loi ne depend pas de l'ordre des asperites : un genome est le poids
+    de chacune des 121 hauteurs entieres (DE/rand/1/bin). Avec
+    changement_rayons, chaque hauteur a en plus un rayon commun a ses
+    asperites.
+
+    Parameters
+    ----------
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    pool : Executeur
+        Executeur cree par genetique.creer_pool.
+    arret : genetique.CriteresArret
+        Regles d'arret, une generation par lot d'essais.
+    graine : np.random.SeedSequence
+        Graine de l'execution.
+    taille_population : integer, optional
+        Nombre de genomes.
+    facteur : float, optional
+        Facteur de la difference ajoutee a chaque mutant.
+    croisement : float, optional
+        Probabilite de prendre un gene du mutant.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs du meilleur genome.
+    liste_score : list of floats
+        Meilleur score de chaque generation.
+
+    """
+    rng = np.random.default_rng(graine)
+    nombre_asperites = Individu.nombre_asperites
+    bas = np.zeros(121)
+    haut = np.ones(121)
+    if Individu.changement_rayons:
+        bas = np.concatenate((bas, np.full(121, 100.)))
+        haut = np.concatenate((haut, np.full(121, 530.)))
+    dimension = len(bas)
+    cache = genetique.CacheScores()
+
+    def evaluer(genomes):
+        hauteurs = histogramme_vers_hauteurs(genomes[:, :121],
+                                             nombre_asperites)
+        rayons = None
+        if dimension > 121:
+            rayons = np.take_along_axis(genomes[:, 121:], hauteurs, axis=1)
+        arret.ajouter_evaluations(len(genomes))
+        return evaluer_genomes(hauteurs, rayons, points, cache, pool)
+
+    genomes = rng.uniform(bas, haut, (taille_population, dimension))
+    population = evaluer(genomes)
+    liste_score = []
+    while True:
+        # Trois genomes distincts, et distincts de la cible, par essai
+        autres = np.argsort(rng.random((taille_population,
+                                        taille_population))
+                            + np.eye(taille_population), axis=1)[:, :3]
+        mutants = np.clip(genomes[autres[:, 0]] + facteur
+                          * (genomes[autres[:, 1]] - genomes[autres[:, 2]]),
+                          bas, haut)
+        du_mutant = rng.random((taille_population, dimension)) < croisement
+        du_mutant[np.arange(taille_population),
+                  rng.integers(0, dimension, taille_population)] = True
+        essais = np.where(du_mutant, mutants, genomes)
+        population_essais = evaluer(essais)
+        remplaces = population_essais.scores <= population.scores
+        genomes[remplaces] = essais[remplaces]
+        population.hauteurs[remplaces] = population_essais.hauteurs[remplaces]
+        population.scores[remplaces] = population_essais.scores[remplaces]
+        liste_score.append(np.min(population.scores))
+        if arret.verifier(liste_score) is not None:
+            return (population.hauteurs[np.argmin(population.scores)].copy(),
+                    liste_score)
+
+
+MOTEURS = {'genetique': _genetique, 'cmaes': _cmaes,
+           'evolution_differentielle': _evolution_differentielle}
+
+
+def optimiser(points, moteur='genetique', nombre_asperites=None,
+              changement_rayons=None, graine=None, arret=None, pool=None,
+              mode='serie', nombre_processus=None, **options):
+    """
+    Cherche une surface qui respecte le cahier des charges.
+
+    Tous les moteurs partagent l'evaluateur de l'algorithme genetique
+    (genetique.evaluer_population) et son executeur.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    moteur : str, optional
+        'genetique', 'cmaes' ou 'evolution_differentielle'.
+    nombre_asperites : integer, optional
+        Nombre d'asperites, Individu.nombre_asperites par defaut.
+    changement_rayons : boolean, optional
+        Rayons optimises avec les hauteurs, Individu.changement_rayons par
+        defaut.
+    graine : integer or np.random.SeedSequence, optional
+        Graine de l'execution. Aleatoire par defaut.
+    arret : genetique.CriteresArret, optional
+        Regles d'arret, 2000 generations par defaut.
+    pool : Executeur, optional
+        Executeur cree par genetique.creer_pool pour les memes points et la
+        meme configuration des Individus.
+    mode : str, optional
+        Executeur cree sans pool : 'serie', 'threads' ou 'processus'.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+    **options
+        Parametres propres au moteur.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs des asperites de la meilleure surface.
+    liste_score : list of floats
+        Meilleur score de chaque generation.
+
+    """
+    if moteur not in MOTEURS:
+        raise ValueError("Moteur d'optimisation inconnu : " + str(moteur))
+    configuration = genetique.configuration_individu()
+    if nombre_asperites is not None:
+        Individu.nombre_asperites = nombre_asperites
+    if changement_rayons is not None:
+        Individu.changement_rayons = changement_rayons
+    try:
+        if pool is None:
+            algo_direct.cache_courbes.prechauffer([1], [120])
+            with genetique.creer_pool(points, nombre_processus,
+                                      mode) as pool:
+                return optimiser(points, moteur, graine=graine, arret=arret,
+                                 pool=pool, **options)
+        if arret is None:
+            arret = genetique.CriteresArret()
+        if not isinstance(graine, np.random.SeedSequence):
+            graine = np.random.SeedSequence(graine)
+        arret.demarrer()
+        return MOTEURS[moteur](points, pool, arret, graine, **options)
+    finally:
+        for nom, valeur in configuration.items():
+            setattr(Individu, nom, valeur)
+
+
+def comparer(points, moteurs=tuple(MOTEURS), score_cible=2e-4,
+             evaluations_max=50000, repetitions=3, graine=None, mode='serie',
+             nombre_processus=None):
+    """
+    Mesure le nombre d'evaluations de chaque moteur pour atteindre un score.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    moteurs : tuple of str, optional
+        Moteurs compares, tous par defaut.
+    score_cible : float, optional
+        Score a atteindre.
+    evaluations_max : integer, optional
+        Nombre d'evaluations apres lequel une execution est abandonnee.
+    repetitions : integer, optional
+        Nombre d'executions par moteur.
+    graine : integer or np.random.SeedSequence, optional
+        Graine maitresse : l'execution k de chaque moteur recoit la meme
+        graine.
+    mode : str, optional
+        Executeur partage par toutes les executions.
+    nombre_processus : integer, optional
+        Nombre de processus ou de threads.
+
+    Returns
+    -------
+    dict
+        Pour chaque moteur, liste de dictionnaires (evaluations, atteint,
+        score, duree) de ses executions.
+
+    """
+    if not isinstance(graine, np.random.SeedSequence):
+        graine = np.random.SeedSequence(graine)
+    graines = graine.spawn(repetitions)
+    resultats = {}
+    algo_direct.cache_courbes.prechauffer([1], [120])
+    with genetique.creer_pool(points, nombre_processus, mode) as pool:
+        for moteur in moteurs:
+            resultats[moteur] = []
+            for graine_execution in graines:
+                arret = genetique.CriteresArret(
+                    score_cible=score_cible, evaluations_max=evaluations_max,
+                    generations_max=None)
+                debut = time.perf_counter()
+                _, liste_score = optimiser(points, moteur,
+                                           graine=graine_execution,
+                                           arret=arret, pool=pool)
+                resultats[moteur].append({
+                    'evaluations': arret.evaluations,
+                    'atteint': arret.critere == 'score_cible',
+                    'score': liste_score[-1],
+                    'duree': time.perf_counter() - debut})
+    return resultats
+
+
+def rapport_comparaison(resultats, score_cible=2e-4):
+    """
+    Met en forme la comparaison des moteurs.
+
+    Parameters
+    ----------
+    resultats : dict
+        Resultats de comparer.
+    score_cible : float, optional
+        Score a atteindre utilise par comparer.
+
+    Returns
+    -------
+    str
+        Tableau du nombre d'executions qui atteignent le score, de la
+        mediane de leurs evaluations, du score final median et de la duree
+        moyenne de chaque moteur.
+
+    """
+    lignes = ['Score cible : {:.3g}'.format(score_cible),
+              '{:<26}{:>9}{:>13}{:>14}{:>11}'.format(
+                  'Moteur', 'Atteint', 'Evaluations', 'Score median',
+                  'Duree (s)')]
+    for moteur, executions in resultats.items():
+        atteintes = [execution['evaluations'] for execution in executions
+                     if execution['atteint']]
+        lignes.append('{:<26}{:>9}{:>13}{:>14.3g}{:>11.1f}'.format(
+            moteur, '{}/{}'.format(len(atteintes), len(executions)),
+            '{:.0f}'.format(np.median(atteintes)) if atteintes else '-',
+            np.median([execution['score'] for execution in executions]),
+            np.mean([execution['duree'] for execution in executions])))
+    return '\n'.join(lignes)
+
+
+if __name__ == "__main__":
+    print(rapport_comparaison(comparer(
+        [(18384800256 * (90*i+1),
+          18384800256 * (90*i+1) * 3.1069013782046355e-06)
+         for i in range(10)])))
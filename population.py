@@ -0,0 +1,560 @@
+# -*- coding: utf-8 -*-
+
+
+"""Classe Population qui stocke tous les individus d'une generation."""
+
+from multiprocessing import shared_memory
+import numpy as np
+from individu import Individu, fusion_genes, mutation_hauteurs, \
+    mutation_rayons, TYPE_HAUTEURS, TYPE_RAYONS, PROBABILITE_MUTATION, \
+    PAS_MUTATION
+
+
+class Population:
+    """
+    Classe qui represente une population stockee sous forme de tableaux.
+
+    Chaque ligne des tableaux correspond a un individu : les genomes de toute
+    la generation sont contigus en memoire et les operateurs genetiques
+    s'appliquent au tableau entier.
+
+    ...
+
+    Attributes
+    ----------
+    hauteurs : np.array of integers
+        Tableau (taille_population, nombre_asperites) des hauteurs.
+    rayons : np.array of integers
+        Tableau (taille_population, nombre_asperites) des rayons de courbure.
+    scores : np.array of floats
+        Score de chaque individu.
+    taux : np.array of floats
+        Probabilite de mutation propre a chaque individu, transmise aux
+        enfants pour l'auto-adaptation.
+
+    Public methods
+    -------
+    aleatoire(taille_population: int, rng: np.random.Generator) -> Population
+        Cree une population aleatoire.
+    depuis_individus(individus: list of Individus) -> Population
+        Cree une population a partir d'une liste d'Individus.
+    individu(i: int) -> Individu
+        Obtient l'Individu correspondant a une ligne, sans copie.
+    individus() -> list of Individus
+        Obtient tous les Individus de la population, sans copie.
+    selection() -> Population
+        Selectionne la meilleure moitie de la population.
+    croisement(rng: np.random.Generator) -> Population
+        Cree les enfants de deux parents consecutifs.
+    mutation(probabilite: float, rng: np.random.Generator, pas: int)
+        Realise la mutation de toute la population.
+    concatener(autre: Population) -> Population
+        Ajoute les individus d'une autre population.
+    meilleurs(nombre: int) -> Population
+        Copie les meilleurs individus.
+    remplacer_pires(autre: Population)
+        Remplace les moins bons individus par ceux d'une autre population.
+    """
+
+    def __init__(self, hauteurs, rayons, scores=None, taux=None):
+        """
+        Initialise une instance de Population.
+
+        Parameters
+        ----------
+        hauteurs : np.array of floats
+            Tableau (taille_population, nombre_asperites) des hauteurs.
+        rayons : np.array of floats
+            Tableau (taille_population, nombre_asperites) des rayons.
+        scores : np.array of floats, optional
+            Score de chaque individu, nuls par defaut comme pour Individu.
+        taux : np.array of floats, optional
+            Probabilite de mutation de chaque individu, 0.4 par defaut.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.hauteurs = hauteurs
+        self.rayons = rayons
+        if scores is None:
+            scores = np.zeros(len(hauteurs))
+        self.scores = scores
+        if taux is None:
+            taux = np.full(len(hauteurs), PROBABILITE_MUTATION)
+        self.taux = taux
+
+    @classmethod
+    def aleatoire(cls, taille_population, rng=None):
+        """
+        Cree une population aleatoire.
+
+        Parameters
+        ----------
+        taille_population : integer
+            Nombre d'individus dans la population.
+        rng : np.random.Generator, optional
+            Generateur de nombres aleatoires.
+
+        Returns
+        -------
+        Population
+            Population non evaluee.
+
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        forme = (taille_population, Individu.nombre_asperites)
+        # Hauteurs entre 0um et 120um, rayons entre 100um et 530um
+        hauteurs = rng.integers(0, 121, forme, dtype=TYPE_HAUTEURS)
+        if Individu.changement_rayons:
+            rayons = 10 * rng.integers(10, 54, forme, dtype=TYPE_RAYONS)
+        else:
+            rayons = np.full(forme, 526, dtype=TYPE_RAYONS)
+        return cls(hauteurs, rayons)
+
+    @classmethod
+    def depuis_individus(cls, individus):
+        """
+        Cree une population a partir d'une liste d'Individus.
+
+        Parameters
+        ----------
+        individus : list of Individus
+            Individus a rassembler.
+
+        Returns
+        -------
+        population : Population
+            Population contenant une copie des genomes et les scores.
+
+        """
+        return cls(np.array([individu.get_hauteurs()
+                             for individu in individus]),
+                   np.array([individu.get_rayons_courbure()
+                             for individu in individus]),
+                   np.array([individu.get_score() for individu in individus],
+                            dtype=float))
+
+    def __len__(self):
+        """
+        Donne le nombre d'individus.
+
+        Returns
+        -------
+        integer
+            Taille de la population.
+
+        """
+        return len(self.hauteurs)
+
+    def __getitem__(self, i):
+        """
+        Obtient l'Individu correspondant a une ligne, comme pour une liste.
+
+        Parameters
+        ----------
+        i : integer
+            Numero de l'individu.
+
+        Returns
+        -------
+        Individu
+            Individu dont les genes sont les lignes i des tableaux.
+
+        """
+        return self.individu(i)
+
+    def individu(self, i):
+        """
+        Obtient l'Individu correspondant a une ligne, sans copie.
+
+        Parameters
+        ----------
+        i : integer
+            Numero de l'individu.
+
+        Returns
+        -------
+        individu : Individu
+            Individu dont les genes sont les lignes i des tableaux.
+
+        """
+        individu = Individu(hauteurs=self.hauteurs[i], rayons=self.rayons[i])
+        individu.set_score(None, score=self.scores[i])
+        return individu
+
+    def individus(self):
+        """
+        Obtient tous les Individus de la population, sans copie.
+
+        Returns
+        -------
+        list of Individus
+            Individus de la population.
+
+        """
+        return [self.individu(i) for i in range(len(self))]
+
+    def selection(self):
+        """
+        Selectionne la meilleure moitie de la population.
+
+        Returns
+        -------
+        Population
+            Individus selectionnes, du meilleur au moins bon.
+
+        """
+        # Tri stable, comme sorted, pour garder l'ordre en cas d'egalite
+        ordre = np.argsort(self.scores, kind='stable')[:round(len(self)/2)]
+        return Population(self.hauteurs[ordre], self.rayons[ordre],
+                          self.scores[ordre], self.taux[ordre])
+
+    def croisement(self, rng=None):
+        """
+        Cree les enfants de deux parents consecutifs.
+
+        L'enfant i a pour parents les individus i et i + 1 ; chacun de ses
+        genes vient du pere avec une probabilite seuil tiree pour l'enfant.
+
+        Parameters
+        ----------
+        rng : np.random.Generator, optional
+            Generateur de nombres aleatoires.
+
+        Returns
+        -------
+        Population
+            Population non evaluee des len(self) - 1 enfants.
+
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        hauteurs = fusion_genes(self.hauteurs[:-1], self.hauteurs[1:], rng)
+        if Individu.changement_rayons:
+            rayons = fusion_genes(self.rayons[:-1], self.rayons[1:], rng)
+        else:
+            rayons = self.rayons[:-1].copy()
+        return Population(hauteurs, rayons)
+
+    def mutation(self, probabilite, rng=None, pas=PAS_MUTATION):
+        """
+        Realise la mutation de toute la population.
+
+        Parameters
+        ----------
+        probabilite : float or np.array of floats
+            Probabilite pour un gene de muter, ou une par individu.
+        rng : np.random.Generator, optional
+            Generateur de nombres aleatoires.
+        pas : integer, optional
+            Pas maximal de mutation des hauteurs, 5um par defaut.
+
+        Returns
+        -------
+        None.
+
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        if np.ndim(probabilite):
+            probabilite = np.reshape(probabilite, (-1, 1))  # Par individu
+        self.hauteurs[:] = mutation_hauteurs(self.hauteurs, probabilite, rng,
+                                             pas)
+        if Individu.changement_rayons:
+            self.rayons[:] = mutation_rayons(self.rayons, probabilite, rng)
+
+    def concatener(self, autre):
+        """
+        Ajoute les individus d'une autre population.
+
+        Parameters
+        ----------
+        autre : Population
+            Population a ajouter a la suite.
+
+        Returns
+        -------
+        Population
+            Nouvelle population contenant les deux.
+
+        """
+        return Population(np.concatenate((self.hauteurs, autre.hauteurs)),
+                          np.concatenate((self.rayons, autre.rayons)),
+                          np.concatenate((self.scores, autre.scores)),
+                          np.concatenate((self.taux, autre.taux)))
+
+    def meilleurs(self, nombre):
+        """
+        Copie les meilleurs individus, par exemple pour les faire migrer.
+
+        Parameters
+        ----------
+        nombre : integer
+            Nombre d'individus copies.
+
+        Returns
+        -------
+        Population
+            Copie des meilleurs individus, du meilleur au moins bon.
+
+        """
+        ordre = np.argsort(self.scores, kind='stable')[:nombre]
+        return Population(self.hauteurs[ordre], self.rayons[ordre],
+                          self.scores[ordre], taux=self.taux[ordre])
+
+    def remplacer_pires(self, autre):
+        """
+        Remplace les moins bons individus par ceux d'une autre population.
+
+        Parameters
+        ----------
+        autre : Population
+            Individus evalues a inserer, au plus len(self).
+
+        Returns
+        -------
+        None.
+
+        """
+        pires = np.argsort(self.scores, kind='stable')[::-1][:len(autre)]
+        self.hauteurs[pires] = autre.hauteurs[:len(pires)]
+        self.rayons[pires] = autre.rayons[:len(pires)]
+        self.scores[pires] = autre.scores[:len(pires)]
+        self.taux[pires] = autre.taux[:len(pires)]
+
+
+# Blocs de memoire partagee crees par ce processus, par nom
+_blocs_ouverts = {}
+# Bloc ouvert en lecture par ce processus de calcul, par nom
+_blocs_lus = {}
+
+
+class GenomesPartages:
+    """
+    Classe qui place les genomes d'une population en memoire partagee.
+
+    Les processus de calcul lisent les genomes sans copie a partir d'un
+    descripteur de quelques octets, au lieu de recevoir la population
+    entiere a chaque tache. Le bloc est cree une fois pour une taille de
+    population maximale et reecrit a chaque generation.
+
+    ...
+
+    Attributes
+    ----------
+    taille_max : integer
+        Nombre maximal d'individus dans le bloc.
+    nombre_asperites : integer
+        Nombre d'asperites de chaque individu.
+    taille : integer
+        Nombre d'individus actuellement ecrits dans le bloc.
+
+    Public methods
+    -------
+    ecrire(population: Population)
+        Ecrit les genomes d'une population dans le bloc.
+    descripteur() -> tuple
+        Obtient le descripteur a envoyer aux processus de calcul.
+    lire(descripteur: tuple) -> tuple of np.array
+        Obtient, dans n'importe quel processus, les genomes sans copie.
+    fermer()
+        Libere le bloc de memoire partagee.
+    """
+
+    def __init__(self, taille_max, nombre_asperites):
+        """
+        Initialise une instance de GenomesPartages.
+
+        Parameters
+        ----------
+        taille_max : integer
+            Nombre maximal d'individus dans le bloc.
+        nombre_asperites : integer
+            Nombre d'asperites de chaque individu.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.taille_max = taille_max
+        self.nombre_asperites = nombre_asperites
+        self.taille = 0
+        _, fin = self.__decalages(taille_max, nombre_asperites)
+        self.__bloc = shared_memory.SharedMemory(create=True, size=fin)
+        # Les executeurs du processus createur lisent le bloc directement
+        _blocs_ouverts[self.__bloc.name] = self.__bloc
+
+    @staticmethod
+    def __decalages(taille_max, nombre_asperites):
+        """
+        Calcule la position des rayons et la taille du bloc.
+
+        Parameters
+        ----------
+        taille_max : integer
+            Nombre maximal d'individus dans le bloc.
+        nombre_asperites : integer
+            Nombre d'asperites de chaque individu.
+
+        Returns
+        -------
+        debut_rayons : integer
+            Position des rayons, alignee sur 8 octets.
+        fin : integer
+            Taille totale du bloc en octets.
+
+        """
+        taille_hauteurs = (taille_max * nombre_asperites
+                           * np.dtype(TYPE_HAUTEURS).itemsize)
+        debut_rayons = -(-taille_hauteurs // 8) * 8
+        fin = (debut_rayons + taille_max * nombre_asperites
+               * np.dtype(TYPE_RAYONS).itemsize)
+        return debut_rayons, max(fin, 1)
+
+    @classmethod
+    def __tableaux(cls, bloc, taille_max, nombre_asperites, taille):
+        """
+        Cree les tableaux des genomes sur un bloc de memoire partagee.
+
+        Parameters
+        ----------
+        bloc : shared_memory.SharedMemory
+            Bloc de memoire partagee.
+        taille_max : integer
+            Nombre maximal d'individus dans le bloc.
+        nombre_asperites : integer
+            Nombre d'asperites de chaque individu.
+        taille : integer
+            Nombre d'individus ecrits dans le bloc.
+
+        Returns
+        -------
+        hauteurs : np.array of integers
+            Tableau (taille, nombre_asperites) des hauteurs.
+        rayons : np.array of integers
+            Tableau (taille, nombre_asperites) des rayons.
+
+        """
+        debut_rayons, _ = cls.__decalages(taille_max, nombre_asperites)
+        hauteurs = np.ndarray((taille_max, nombre_asperites), TYPE_HAUTEURS,
+                              bloc.buf)
+        rayons = np.ndarray((taille_max, nombre_asperites), TYPE_RAYONS,
+                            bloc.buf, debut_rayons)
+        return hauteurs[:taille], rayons[:taille]
+
+    def ecrire(self, population):
+        """
+        Ecrit les genomes d'une population dans le bloc.
+
+        Parameters
+        ----------
+        population : Population
+            Population a partager, d'au plus taille_max individus.
+
+        Returns
+        -------
+        None.
+
+        """
+        if len(population) > self.taille_max:
+            raise ValueError("Population trop grande pour le bloc partage : "
+                             + str(len(population)) + " > "
+                             + str(self.taille_max))
+        self.taille = len(population)
+        hauteurs, rayons = self.__tableaux(self.__bloc, self.taille_max,
+                                           self.nombre_asperites, self.taille)
+        hauteurs[:] = population.hauteurs
+        rayons[:] = population.rayons
+
+    def descripteur(self):
+        """
+        Obtient le descripteur a envoyer aux processus de calcul.
+
+        Returns
+        -------
+        tuple
+            (nom du bloc, taille_max, nombre_asperites, taille).
+
+        """
+        return (self.__bloc.name, self.taille_max, self.nombre_asperites,
+                self.taille)
+
+    @classmethod
+    def lire(cls, descripteur):
+        """
+        Obtient les genomes sans copie, dans n'importe quel processus.
+
+        Le bloc n'est ouvert qu'une fois par processus puis reutilise.
+        Un processus de calcul ne garde que le dernier bloc lu : les blocs
+        des executions precedentes, deja liberes par leur createur, sont
+        fermes.
+
+        Parameters
+        ----------
+        descripteur : tuple
+            Descripteur renvoye par descripteur().
+
+        Returns
+        -------
+        hauteurs : np.array of integers
+            Tableau (taille, nombre_asperites) des hauteurs.
+        rayons : np.array of integers
+            Tableau (taille, nombre_asperites) des rayons.
+
+        """
+        nom, taille_max, nombre_asperites, taille = descripteur
+        bloc = _blocs_ouverts.get(nom) or _blocs_lus.get(nom)
+        if bloc is None:
+            for ancien, bloc_ancien in list(_blocs_lus.items()):
+                try:
+                    bloc_ancien.close()
+                except BufferError:
+                    continue  # Encore lu par une tache : ferme plus tard
+                del _blocs_lus[ancien]
+            bloc = _blocs_lus[nom] = shared_memory.SharedMemory(name=nom)
+        return cls.__tableaux(bloc, taille_max, nombre_asperites, taille)
+
+    def fermer(self):
+        """
+        Libere le bloc de memoire partagee.
+
+        Returns
+        -------
+        None.
+
+        """
+        _blocs_ouverts.pop(self.__bloc.name, None)
+        self.__bloc.close()
+        self.__bloc.unlink()
+
+    def __enter__(self):
+        """
+        Permet l'utilisation avec with.
+
+        Returns
+        -------
+        GenomesPartages
+            Le bloc lui-meme.
+
+        """
+        return self
+
+    def __exit__(self, *exception):
+        """
+        Libere le bloc a la sortie du with.
+
+        Parameters
+        ----------
+        *exception : tuple
+            Informations sur une eventuelle exception.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fermer()
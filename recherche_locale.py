@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+
+"""Recherche locale sur les hauteurs guidee par les derivees du score."""
+
+import numpy as np
+from individu import Individu
+import algo_direct
+
+
+def score_surface(hauteurs, rayons, points):
+    """
+    Calcule le score d'une surface avec la methode des Individus.
+
+    Parameters
+    ----------
+    hauteurs : np.array of integers
+        Hauteurs des asperites.
+    rayons : np.array of integers
+        Rayons de courbure des asperites.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+
+    Returns
+    -------
+    float
+        Score de la surface.
+
+    """
+    individu = Individu(hauteurs=hauteurs, rayons=rayons)
+    individu.set_score(points)
+    return individu.get_score()
+
+
+def ameliorer(hauteurs, rayons, points, score, iterations=5,
+              methode='gradient', nombre_genes=20, pas=5):
+    """
+    Ameliore une surface par quelques deplacements entiers de hauteurs.
+
+    A chaque iteration, la derivee du score par rapport aux hauteurs est
+    calculee analytiquement, puis :
+        - 'glouton' : les nombre_genes hauteurs de plus forte derivee
+          bougent de 1um dans le sens qui fait baisser le score ; si le
+          score ne baisse pas, on essaie avec deux fois moins de hauteurs ;
+        - 'gradient' : toutes les hauteurs suivent la derivee, la plus
+          grande bougeant de pas um, arrondies et ramenees dans
+          [0um, 120um] ; si le score ne baisse pas, le pas est divise par
+          deux.
+    Seuls les deplacements qui font baisser le score sont gardes. Chaque
+    calcul de derivee, qui calcule aussi le score, compte pour une
+    evaluation.
+
+    Parameters
+    ----------
+    hauteurs : np.array of integers
+        Hauteurs de la surface.
+    rayons : np.array of integers
+        Rayons de courbure des asperites.
+    points : list of couple of floats
+        Points (force, aire_totale) du cahier des charges.
+    score : float
+        Score actuel de la surface.
+    iterations : integer, optional
+        Nombre maximal de deplacements gardes.
+    methode : str, optional
+        'gradient' ou 'glouton'.
+    nombre_genes : integer, optional
+        Nombre de hauteurs deplacees a la fois par la methode 'glouton'.
+    pas : float, optional
+        Plus grand deplacement de la methode 'gradient', en um.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs ameliorees, du meme type.
+    score : float
+        Score des hauteurs ameliorees.
+    evaluations : integer
+        Nombre de scores calcules, calculs de derivees compris.
+
+    """
+    if methode not in ('gradient', 'glouton'):
+        raise ValueError("Methode de recherche locale inconnue : "
+                         + str(methode))
+    type_hauteurs = np.asarray(hauteurs).dtype
+    hauteurs = np.asarray(hauteurs, dtype=np.int64)
+    evaluations = 0
+    for _ in range(iterations):
+        _, gradient = algo_direct.gradient_score_hauteurs(
+            rayons, hauteurs, points, algo_direct.cache_courbes)
+        evaluations += 1
+        if not np.any(gradient):
+            break
+        direction = -np.sign(gradient).astype(np.int64)
+        # Deplacements qui restent dans [0um, 120um]
+        possibles = ((direction != 0) & (hauteurs + direction >= 0)
+                     & (hauteurs + direction <= 120))
+        if not np.any(possibles):
+            break
+        if methode == 'glouton':
+            ordre = np.argsort(-np.abs(gradient) * possibles,
+                               kind='stable')
+            taille = min(nombre_genes, int(np.sum(possibles)))
+        else:
+            # Les hauteurs bloquees a une borne ne fixent pas l'echelle
+            gradient = np.where(possibles, gradient, 0)
+            taille = pas
+        ameliore = False
+        while taille >= 1 and not ameliore:
+            if methode == 'glouton':
+                candidat = hauteurs.copy()
+                genes = ordre[:taille]
+                candidat[genes] += direction[genes]
+            else:
+                echelle = taille / np.max(np.abs(gradient))
+                candidat = np.clip(np.rint(hauteurs - echelle * gradient),
+                                   0, 120).astype(np.int64)
+            if np.array_equal(candidat, hauteurs):
+                break
+            score_candidat = score_surface(candidat, rayons, points)
+            evaluations += 1
+            if score_candidat < score:
+                hauteurs, score, ameliore = candidat, score_candidat, True
+            else:
+                taille = taille // 2 if methode == 'glouton' else taille / 2
+        if not ameliore:
+            break
+    return hauteurs.astype(type_hauteurs), score, evaluations
+
+
+class RechercheLocale:
+    """
+    Etape de raffinement des meilleurs individus d'une population.
+
+    Par defaut, les individus raffines remplacent leur original dans la
+    population. Un individu raffine peut l'envahir vite et faire converger
+    l'algorithme trop tot : avec reinserer=False, ils sont seulement
+    gardes a part, le meilleur d'entre eux etant le resultat s'il bat
+    celui de la population.
+
+    ...
+
+    Attributes
+    ----------
+    nombre_individus : integer
+        Nombre de meilleurs individus raffines.
+    periode : integer
+        Nombre de generations entre deux raffinements.
+    iterations : integer
+        Nombre maximal de deplacements gardes par individu.
+    methode : str
+        'gradient' ou 'glouton', voir ameliorer.
+    reinserer : boolean
+        Les individus raffines remplacent leur original dans la population.
+    evaluations : integer
+        Nombre total de scores calcules par la recherche locale, calculs de
+        derivees compris.
+    hauteurs, rayons : np.array of integers
+        Genome du meilleur individu raffine, None avant un raffinement.
+    score : float
+        Score du meilleur individu raffine.
+
+    Public methods
+    -------
+    a_appliquer(generation: int) -> bool
+        Indique si le raffinement doit etre fait apres une generation.
+    appliquer(population: Population, points: list) -> int
+        Raffine les meilleurs individus d'une population.
+    meilleur(individu: Individu) -> Individu
+        Obtient le meilleur entre un individu et le meilleur raffine.
+    parametres() -> dict
+        Obtient les arguments qui recreent la recherche locale.
+    """
+
+    def __init__(self, nombre_individus=1, periode=10, iterations=20,
+                 methode='gradient', reinserer=True):
+        """
+        Initialise une instance de RechercheLocale.
+
+        Parameters
+        ----------
+        nombre_individus : integer, optional
+            Nombre de meilleurs individus raffines.
+        periode : integer, optional
+            Nombre de generations entre deux raffinements.
+        iterations : integer, optional
+            Nombre maximal de deplacements gardes par individu.
+        methode : str, optional
+            'gradient' ou 'glouton', voir ameliorer.
+        reinserer : boolean, optional
+            Les individus raffines remplacent leur original dans la
+            population. Sinon, ils sont seulement gardes a part.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.nombre_individus = nombre_individus
+        self.periode = periode
+        self.iterations = iterations
+        self.methode = methode
+        self.reinserer = reinserer
+        self.evaluations = 0
+        self.hauteurs = None
+        self.rayons = None
+        self.score = np.inf
+
+    def a_appliquer(self, generation):
+        """
+        Indique si le raffinement doit etre fait apres une generation.
+
+        Parameters
+        ----------
+        generation : integer
+            Nombre de generations deja calculees.
+
+        Returns
+        -------
+        boolean
+            True toutes les periode generations.
+
+        """
+        return generation % self.periode == 0
+
+    def appliquer(self, population, points):
+        """
+        Raffine les meilleurs individus d'une population.
+
+        La population n'est modifiee, sur place, que si reinserer est vrai.
+
+        Parameters
+        ----------
+        population : Population
+            Population evaluee.
+        points : list of couple of floats
+            Points (force, aire_totale) du cahier des charges.
+
+        Returns
+        -------
+        evaluations : integer
+            Nombre de scores calcules.
+
+        """
+        evaluations = 0
+        meilleurs = np.argsort(population.scores,
+                               kind='stable')[:self.nombre_individus]
+        for i in meilleurs:
+            hauteurs, score, nombre = ameliorer(
+                population.hauteurs[i], population.rayons[i], points,
+                population.scores[i], self.iterations, self.methode)
+            evaluations += nombre
+            if score < self.score:
+                self.hauteurs = hauteurs
+                self.rayons = population.rayons[i].copy()
+                self.score = score
+            if self.reinserer and score < population.scores[i]:
+                population.hauteurs[i] = hauteurs
+                population.scores[i] = score
+        self.evaluations += evaluations
+        return evaluations
+
+    def meilleur(self, individu):
+        """
+        Obtient le meilleur entre un individu et le meilleur raffine.
+
+        Parameters
+        ----------
+        individu : Individu
+            Individu evalue, en general le meilleur de la population.
+
+        Returns
+        -------
+        Individu
+            L'individu, ou le meilleur raffine s'il a un meilleur score.
+
+        """
+        if not self.score < individu.get_score():
+            return individu
+        meilleur = Individu(hauteurs=self.hauteurs.copy(),
+                            rayons=self.rayons.copy())
+        meilleur.set_score(None, score=self.score)
+        return meilleur
+
+    def parametres(self):
+        """
+        Obtient les arguments qui recreent la recherche locale.
+
+        Returns
+        -------
+        dict
+            Arguments de RechercheLocale.
+
+        """
+        return {'nombre_individus': self.nombre_individus,
+                'periode': self.periode, 'iterations': self.iterations,
+                'methode': self.methode, 'reinserer': self.reinserer}
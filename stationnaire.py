@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+
+"""Algorithme genetique stationnaire asynchrone, sans generations."""
+
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+import numpy as np
+from individu import Individu
+import algo_direct
+import genetique
+
+
+def _enfant_stationnaire(hauteurs_pere, rayons_pere, hauteurs_mere,
+                         rayons_mere, graine):
+    """
+    Cree et evalue un enfant dans un processus ou un thread de calcul.
+
+    Parameters
+    ----------
+    hauteurs_pere, rayons_pere : np.array of integers
+        Genome du pere.
+    hauteurs_mere, rayons_mere : np.array of integers
+        Genome de la mere.
+    graine : np.random.SeedSequence
+        Graine propre a l'enfant.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs de l'enfant.
+    rayons : np.array of integers
+        Rayons de l'enfant.
+    score : float
+        Score de l'enfant.
+
+    """
+    rng = np.random.default_rng(graine)
+    individu = genetique.mutation(
+        Individu(Individu(hauteurs=hauteurs_pere, rayons=rayons_pere),
+                 Individu(hauteurs=hauteurs_mere, rayons=rayons_mere),
+                 rng=rng),
+        genetique._points_processus, rng)
+    return (individu.get_hauteurs(), individu.get_rayons_courbure(),
+            individu.get_score())
+
+
+def tournoi(scores, taille_tournoi, rng):
+    """
+    Choisit le meilleur de quelques individus tires au hasard.
+
+    Parameters
+    ----------
+    scores : np.array of floats
+        Score de chaque individu de la population.
+    taille_tournoi : integer
+        Nombre d'individus tires.
+    rng : np.random.Generator
+        Generateur de nombres aleatoires.
+
+    Returns
+    -------
+    integer
+        Numero du vainqueur.
+
+    """
+    candidats = rng.choice(len(scores), taille_tournoi, replace=False)
+    return candidats[np.argmin(scores[candidats])]
+
+
+def inserer(population, hauteurs, rayons, score, insertion, taille_tournoi,
+            rng):
+    """
+    Insere un enfant evalue dans la population, a la place d'un moins bon.
+
+    Parameters
+    ----------
+    population : Population
+        Population modifiee sur place.
+    hauteurs, rayons : np.array of integers
+        Genome de l'enfant.
+    score : float
+        Score de l'enfant.
+    insertion : str
+        'pire' : l'enfant remplace le moins bon de la population ;
+        'tournoi' : il remplace le moins bon de taille_tournoi individus
+        tires au hasard. Dans les deux cas, seulement s'il est meilleur.
+    taille_tournoi : integer
+        Nombre d'individus tires pour l'insertion par tournoi.
+    rng : np.random.Generator
+        Generateur de nombres aleatoires.
+
+    Returns
+    -------
+    boolean
+        True si l'enfant a ete insere.
+
+    """
+    if insertion == 'pire':
+        remplace = np.argmax(population.scores)
+    elif insertion == 'tournoi':
+        candidats = rng.choice(len(population), taille_tournoi,
+                               replace=False)
+        remplace = candidats[np.argmax(population.scores[candidats])]
+    else:
+        raise ValueError("Insertion inconnue : " + str(insertion))
+    if not score < population.scores[remplace]:
+        return False
+    population.hauteurs[remplace] = hauteurs
+    population.rayons[remplace] = rayons
+    population.scores[remplace] = score
+    return True
+
+
+def _soumettre(executeur, population, taille_tournoi, rng, graine):
+    """
+    Confie la creation d'un enfant de deux parents choisis par tournoi.
+
+    Parameters
+    ----------
+    executeur : concurrent.futures.Executor
+        Processus ou threads de calcul.
+    population : Population
+        Population actuelle.
+    taille_tournoi : integer
+        Nombre d'individus tires pour choisir chaque parent.
+    rng : np.random.Generator
+        Generateur des choix de parents.
+    graine : np.random.SeedSequence
+        Graine dont l'enfant recoit une suite propre.
+
+    Returns
+    -------
+    concurrent.futures.Future
+        Calcul de l'enfant en cours.
+
+    """
+    pere = tournoi(population.scores, taille_tournoi, rng)
+    mere = tournoi(population.scores, taille_tournoi, rng)
+    # Copies : la population peut changer avant l'envoi de la tache
+    return executeur.submit(_enfant_stationnaire,
+                            population.hauteurs[pere].copy(),
+                            population.rayons[pere].copy(),
+                            population.hauteurs[mere].copy(),
+                            population.rayons[mere].copy(),
+                            graine.spawn(1)[0])
+
+
+def genetique_stationnaire(points, nombre_travailleurs=None,
+                           mode='processus', insertion='pire',
+                           taille_tournoi=3, graine=None, arret=None,
+                           taille_population=50):
+    """
+    Realise l'algorithme genetique stationnaire asynchrone.
+
+    Il n'y a pas de generation : chaque travailleur libre recoit aussitot
+    deux parents choisis par tournoi, cree et evalue l'enfant, qui est
+    insere dans la population des qu'il est pret. Un calcul lent n'arrete
+    donc jamais les autres.
+
+    Parameters
+    ----------
+    points : list of pairs of floats
+        Liste des points (force, aire de contact) du cahier des charges.
+    nombre_travailleurs : integer, optional
+        Nombre de processus ou de threads, le nombre de coeurs par defaut.
+    mode : str, optional
+        'processus' ou 'threads'.
+    insertion : str, optional
+        'pire' ou 'tournoi', voir inserer.
+    taille_tournoi : integer, optional
+        Nombre d'individus tires pour choisir un parent ou une place.
+    graine : integer or np.random.SeedSequence, optional
+        Graine maitresse des choix de parents et des enfants. L'ordre
+        d'arrivee des enfants dependant des durees de calcul, une execution
+        n'est pas reproductible bit a bit.
+    arret : genetique.CriteresArret, optional
+        Regles d'arret ; chaque enfant evalue compte comme une generation.
+        Par defaut, autant d'evaluations que 2000 generations.
+    taille_population : integer, optional
+        Taille, constante, de la population.
+
+    Returns
+    -------
+    hauteurs : np.array of integers
+        Hauteurs des asperites du meilleur individu.
+    historique : np.array of floats
+        Tableau (nombre d'ameliorations, 2) des couples (temps en secondes,
+        meilleur score) a chaque amelioration.
+    debit : float
+        Nombre d'enfants evalues par seconde.
+
+    """
+    if nombre_travailleurs is None:
+        nombre_travailleurs = genetique.nombre_coeurs
+    if arret is None:
+        arret = genetique.CriteresArret(
+            evaluations_max=taille_population + 2000 * 23,
+            generations_max=None)
+    executeurs = {'processus': ProcessPoolExecutor,
+                  'threads': ThreadPoolExecutor}
+    if mode not in executeurs:
+        raise ValueError("Mode d'execution inconnu : " + str(mode))
+    if not isinstance(graine, np.random.SeedSequence):
+        graine = np.random.SeedSequence(graine)
+    graine_population, graine_choix, graine_enfants = graine.spawn(3)
+    rng = np.random.default_rng(graine_choix)
+    algo_direct.cache_courbes.prechauffer([1], [120])
+    arret.demarrer()
+    debut = time.perf_counter()
+    population = genetique.creer_population(taille_population, points,
+                                            vectorise=True,
+                                            graine=graine_population)
+    arret.ajouter_evaluations(len(population))
+    liste_score = [np.min(population.scores)]
+    historique = [(time.perf_counter() - debut, liste_score[-1])]
+    debut_enfants = time.perf_counter()
+
+    with executeurs[mode](nombre_travailleurs,
+                          initializer=genetique._initialiser_processus,
+                          initargs=(points, algo_direct.cache_courbes,
+                                    genetique.configuration_individu())
+                          ) as executeur:
+        en_cours = {_soumettre(executeur, population, taille_tournoi, rng,
+                               graine_enfants)
+                    for _ in range(nombre_travailleurs)}
+        while arret.critere is None:
+            finis, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for fini in finis:
+                hauteurs, rayons, score = fini.result()
+                arret.ajouter_evaluations(1)
+                inserer(population, hauteurs, rayons, score, insertion,
+                        taille_tournoi, rng)
+                liste_score.append(np.min(population.scores))
+                if liste_score[-1] < liste_score[-2]:
+                    historique.append((time.perf_counter() - debut,
+                                       liste_score[-1]))
+                if arret.verifier(liste_score) is not None:
+                    break
+                en_cours.add(_soumettre(executeur, population,
+                                        taille_tournoi, rng, graine_enfants))
+        for tache in en_cours:
+            tache.cancel()
+    debit = ((arret.evaluations - taille_population)
+             / (time.perf_counter() - debut_enfants))
+    meilleur = np.argmin(population.scores)
+    return (population.hauteurs[meilleur].copy(), np.array(historique),
+            debit)